@@ -1,26 +1,39 @@
 import psycopg2 # type: ignore
 import pydantic
 import sqlalchemy
+import hashlib
 import json
+import os
 import time
 
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from llama_index.core import Document, VectorStoreIndex, Settings
+from llama_index.core.schema import MetadataMode
 from llama_index.llms.gemini import Gemini # type: ignore
 from llama_index.embeddings.gemini import GeminiEmbedding
+from ratelimit import TokenBucket, backoff_delay
 
 class TableInfo(pydantic.BaseModel):
     table_name: str = pydantic.Field(..., description="table name (must be underscores and NO spaces)")
     table_summary: str = pydantic.Field(..., description="short, concise summary/caption of the table")
 
 class DatabaseIndexer:
-    def __init__(self, logger, google_api_keys, llm_model, embedding_model):
+    def __init__(self, logger, google_api_keys, llm_model, embedding_model, summary_collection, scheduler):
         self.logger = logger
         self.google_api_keys = google_api_keys
         self.llm_model = llm_model
         self.embedding_model = embedding_model
+        self.summary_collection = summary_collection
+        self.scheduler = scheduler
+        self.summary_rate = float(os.environ['SUMMARY_REQUESTS_PER_MINUTE']) / 60
+        self.summary_burst = int(os.environ['SUMMARY_BURST'])
+        self.summary_max_retries = int(os.environ['SUMMARY_MAX_RETRIES'])
+        self.summary_backoff_base = float(os.environ['SUMMARY_BACKOFF_BASE'])
+        self.summary_backoff_max = float(os.environ['SUMMARY_BACKOFF_MAX'])
             
         self.model_pool = deque(maxlen=len(self.google_api_keys))
+        self.rate_limiters = []
 
         self.load_models()
 
@@ -38,10 +51,10 @@ class DatabaseIndexer:
                 Gemini(model_name=self.llm_model, api_key=api_key),
                 GeminiEmbedding(model_name=self.embedding_model, api_key=api_key)
             ))
+        self.rate_limiters = [TokenBucket(self.summary_rate, self.summary_burst) for _ in self.model_pool]
                 
     def get_next_models(self):
-        llm, embedding_model = self.model_pool[0]
-        self.model_pool.rotate(-1)
+        llm, embedding_model = self.model_pool[self.scheduler.choose()]
         Settings.llm = llm
         Settings.embed_model = embedding_model
         return llm, embedding_model
@@ -58,6 +71,25 @@ class DatabaseIndexer:
             self.logger.error(f"Failed to get table info for {table_name}: {e}")
             raise
 
+    def get_table_fingerprint(self, engine, table_name):
+        try:
+            inspector = sqlalchemy.inspect(engine)
+            signature = [
+                (column['name'], str(column['type']), column.get('nullable'))
+                for column in inspector.get_columns(table_name)
+            ]
+            return hashlib.sha256(json.dumps([self.llm_model, self.embedding_model, table_name, signature]).encode()).hexdigest()
+        except Exception as e:
+            self.logger.error(f"Failed to fingerprint table {table_name}: {e}")
+            raise
+
+    def load_stored_tables(self):
+        stored = self.summary_collection.get(include=["documents", "metadatas", "embeddings"])
+        return {
+            table_name: (metadata["fingerprint"], summary, [float(value) for value in embedding])
+            for table_name, summary, metadata, embedding in zip(stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"])
+        }
+
     def get_table_summary(self, engine, llm, table_name, exclude_table_name_list):
         try:
             table_str = self.get_table_info(engine, table_name)
@@ -67,53 +99,110 @@ class DatabaseIndexer:
                 table_name=table_name
             )
             response = llm.complete(formatted_prompt)
-            time.sleep(10)
             return response.text
         except Exception as e:
             self.logger.error(f"Failed to get table summary for {table_name}: {e}")
             raise
 
+    def summarize_table(self, engine, table_name, exclude_table_name_list):
+        slot = None
+        for attempt in range(self.summary_max_retries + 1):
+            slot = self.scheduler.acquire(exclude=(slot,), delay=lambda slot: self.rate_limiters[slot].wait_time())
+            self.rate_limiters[slot].acquire()
+            llm, _ = self.model_pool[slot]
+            started = time.monotonic()
+            try:
+                summary = self.get_table_summary(engine, llm, table_name, exclude_table_name_list)
+                self.scheduler.release(slot, started)
+                return summary
+            except Exception as e:
+                self.scheduler.release(slot, started, e)
+                if attempt < self.summary_max_retries:
+                    time.sleep(backoff_delay(attempt, self.summary_backoff_base, self.summary_backoff_max))
+        self.logger.warning(f"Giving up on summarizing {table_name} after {self.summary_max_retries + 1} attempts")
+        return None
+
+    def embed_texts(self, texts):
+        slot = None
+        for attempt in range(self.summary_max_retries + 1):
+            slot = self.scheduler.acquire(exclude=(slot,))
+            _, embedding_model = self.model_pool[slot]
+            started = time.monotonic()
+            try:
+                embeddings = embedding_model.get_text_embedding_batch(texts)
+                self.scheduler.release(slot, started)
+                return embeddings
+            except Exception as e:
+                self.scheduler.release(slot, started, e)
+                error = e
+                if attempt < self.summary_max_retries:
+                    time.sleep(backoff_delay(attempt, self.summary_backoff_base, self.summary_backoff_max))
+        raise error
+
+    def parse_summary(self, summary):
+        try:
+            cleaned_summary = summary.strip().lstrip('`').rstrip('`')
+            if cleaned_summary.startswith('json'):
+                cleaned_summary = cleaned_summary[4:].strip()
+            result = json.loads(cleaned_summary)
+            return result['table_summary']
+        except json.JSONDecodeError:
+            return summary
+
     def process_tables(self, engine):
         try:
             metadata = sqlalchemy.MetaData()
             metadata.reflect(bind=engine)
             table_names = metadata.tables.keys()
+            stored = self.load_stored_tables()
+
+            fingerprints = {table_name: self.get_table_fingerprint(engine, table_name) for table_name in table_names}
+            pending = [
+                table_name for table_name, fingerprint in fingerprints.items()
+                if table_name not in stored or stored[table_name][0] != fingerprint
+            ]
+
+            with ThreadPoolExecutor(max_workers=len(self.model_pool)) as executor:
+                summaries = dict(zip(pending, executor.map(
+                    lambda table_name: self.summarize_table(engine, table_name, table_names), # skeptical with table names
+                    pending
+                )))
 
             table_infos = []
             for table_name in table_names:
-                llm, _ = self.get_next_models()
-                res = False
-                while not res:
-                    try:
-                        summary = self.get_table_summary(engine, llm, table_name, table_names) # skeptical with table names
-                        res = True
-                    except Exception as e:
-                        print("Exception Occured - ", time.time())
-                        llm, _ = self.get_next_models()
-                try:
-                    cleaned_summary = summary.strip().lstrip('`').rstrip('`')
-                    if cleaned_summary.startswith('json'):
-                        cleaned_summary = cleaned_summary[4:].strip()
-                    result = json.loads(cleaned_summary)
-                    table_summary = result['table_summary']
-                except json.JSONDecodeError:
-                    table_summary = summary
+                if table_name not in summaries:
+                    table_summary = stored[table_name][1]
+                elif summaries[table_name] is None:
+                    table_summary = self.get_table_info(engine, table_name)
+                    fingerprints[table_name] = None
+                else:
+                    table_summary = self.parse_summary(summaries[table_name])
 
                 table_info = TableInfo(table_name=table_name, table_summary=table_summary)
                 table_infos.append(table_info)
 
-            self.logger.info(f"Processed {len(table_infos)} tables")
-            return table_infos
+            dropped = [table_name for table_name in stored if table_name not in fingerprints]
+            if dropped:
+                self.summary_collection.delete(ids=dropped)
+
+            unchanged = {
+                table_name: stored[table_name][2]
+                for table_name, fingerprint in fingerprints.items()
+                if table_name in stored and stored[table_name][0] == fingerprint
+            }
+            self.logger.info(f"Processed {len(table_infos)} tables: {len(table_infos) - len(unchanged)} summarized, {len(unchanged)} unchanged, {len(dropped)} dropped")
+            return table_infos, fingerprints, unchanged
         except Exception as e:
             self.logger.error(f"Failed to process tables: {e}")
             raise
 
-    def create_documents(self, table_infos):
+    def create_documents(self, table_infos, unchanged):
         try:
             documents = []
             for table_info in table_infos:
                 content = f"Table Name: {table_info.table_name}\nTable Summary: {table_info.table_summary}"
-                doc = Document(text=content, metadata={"table_name": table_info.table_name})
+                doc = Document(id_=table_info.table_name, text=content, metadata={"table_name": table_info.table_name})
+                doc.embedding = unchanged.get(table_info.table_name)
                 documents.append(doc)
             self.logger.info(f"Created {len(documents)} documents")
             return documents
@@ -121,9 +210,32 @@ class DatabaseIndexer:
             self.logger.error(f"Failed to create documents: {e}")
             raise
 
+    def embed_documents(self, documents, table_infos, fingerprints):
+        try:
+            summaries = {table_info.table_name: table_info.table_summary for table_info in table_infos}
+            missing = [doc for doc in documents if doc.embedding is None]
+            if not missing:
+                return
+            embeddings = self.embed_texts([doc.get_content(metadata_mode=MetadataMode.EMBED) for doc in missing])
+            for doc, embedding in zip(missing, embeddings):
+                doc.embedding = embedding
+
+            summarized = [doc for doc in missing if fingerprints[doc.id_]]
+            if summarized:
+                self.summary_collection.upsert(
+                    ids=[doc.id_ for doc in summarized],
+                    documents=[summaries[doc.id_] for doc in summarized],
+                    metadatas=[{"fingerprint": fingerprints[doc.id_]} for doc in summarized],
+                    embeddings=[doc.embedding for doc in summarized],
+                )
+            self.logger.info(f"Embedded {len(missing)} and stored {len(summarized)} table summaries")
+        except Exception as e:
+            self.logger.error(f"Failed to embed documents: {e}")
+            raise
+
     def create_index(self, documents, storage_context):
         try:
-            index = VectorStoreIndex.from_documents(documents, storage_context=storage_context)
+            index = VectorStoreIndex(documents, storage_context=storage_context)
             self.logger.info("Vector index created successfully")
             return index
         except Exception as e:
@@ -132,11 +244,12 @@ class DatabaseIndexer:
 
     def run(self, engine, storage_context):
         try:
-            table_infos = self.process_tables(engine)
-            documents = self.create_documents(table_infos)
+            table_infos, fingerprints, unchanged = self.process_tables(engine)
+            documents = self.create_documents(table_infos, unchanged)
+            self.embed_documents(documents, table_infos, fingerprints)
             index = self.create_index(documents, storage_context)
             self.logger.info("Indexing process completed successfully")
-            return index
+            return index, table_infos
         except Exception as e:
             self.logger.error(f"Indexing process failed: {e}")
             raise
\ No newline at end of file
@@ -1,20 +1,27 @@
 import os
+import asyncio
 import logging
 import threading
 import time
 import sqlalchemy
 import chromadb # type: ignore
 import queue
+from concurrent.futures import Future
 import yaml
 from collections import deque
-from contextlib import ExitStack
 from llama_index.llms.gemini import Gemini # type: ignore
 from llama_index.embeddings.gemini import GeminiEmbedding
-from llama_index.core import Settings, StorageContext
+from llama_index.core import Settings, SQLDatabase, StorageContext
 from llama_index.vector_stores.chroma import ChromaVectorStore # type: ignore
 
 import indexer
 import pipeline
+from result_cache import SQLResultCache
+from template_cache import TemplateCache, TemplateMismatch
+from scheduler import KeyScheduler
+
+COLLECTION_PREFIX = "table_info_collection"
+SUMMARY_COLLECTION = "table_summaries"
 
 class LLM:
     def __init__(self):
@@ -30,18 +37,26 @@ class LLM:
         self.rebuild_queue = queue.Queue()
 
         self.llm_pool = deque(maxlen=len(self.google_api_keys))
-        self.pipeline_pool = deque(maxlen=len(self.google_api_keys))
-        self.qb_locks = []
+        self.embed_pool = []
+        self.scheduler = KeyScheduler("llm", len(self.google_api_keys))
+        self.result_cache = SQLResultCache(self.sql_result_cache_bytes)
+        self.template_cache = TemplateCache(self.sql_template_cache_size)
+        self.generation_lock = threading.Lock()
+        self.generation = None
+        self.in_flight = {}
+        self.retired = set()
         self.version = 0
+        self.on_activate = None
 
         self.last_rebuild_time = 0
         self.rebuild_interval = 60
 
         self.setup()
 
-        self.query_thread = threading.Thread(target=self.process_queries)
+        self.query_threads = [threading.Thread(target=self.process_queries) for _ in self.generation[1]]
         self.listen_rebuild_thread = threading.Thread(target=self.listen_rebuild)
-        self.query_thread.start()
+        for query_thread in self.query_threads:
+            query_thread.start()
         self.listen_rebuild_thread.start()
 
     def setup_logger(self):
@@ -83,6 +98,9 @@ class LLM:
             self.google_api_keys = self.load_api_keys()
             self.llm_model = os.environ['LLM_MODEL']
             self.embedding_model = os.environ['EMBED_MODEL']
+            self.query_max_retries = int(os.environ['QUERY_MAX_RETRIES'])
+            self.sql_result_cache_bytes = int(os.environ['SQL_RESULT_CACHE_BYTES'])
+            self.sql_template_cache_size = int(os.environ['SQL_TEMPLATE_CACHE_SIZE'])
 
             self.logger.info("Environment Variables Loaded.")
         except FileNotFoundError as e:
@@ -109,66 +127,105 @@ class LLM:
         try:
             for api_key in self.google_api_keys:
                 self.llm_pool.append(Gemini(model_name=self.llm_model, api_key=api_key))
+                self.embed_pool.append(GeminiEmbedding(model_name=self.embedding_model, api_key=api_key))
             self.logger.info("LLM and Embedding models set up")
         except Exception as e:
             self.logger.error(f"Failed to set up LLM or embedding model: {e}")
             raise
 
-    def get_next_llm(self):
-        llm = self.llm_pool[0]
-        self.llm_pool.rotate(-1)
-        return llm
-
     def chroma(self):
         try:
             client = chromadb.PersistentClient(path=os.path.join(self.store_path, "chroma_db"))
-            chroma_collection = client.get_or_create_collection("table_info_collection")
-            vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
-            storage_context = StorageContext.from_defaults(vector_store=vector_store)
+            for collection in client.list_collections():
+                if collection.name.startswith(COLLECTION_PREFIX):
+                    client.delete_collection(collection.name)
+            summary_collection = client.get_or_create_collection(SUMMARY_COLLECTION)
             self.logger.info("Chroma set up successfully")
-            return client, chroma_collection, vector_store, storage_context
+            return client, summary_collection
         except Exception as e:
             self.logger.error(f"Failed to set up Chroma: {e}")
             raise
 
+    def collection_name(self, version):
+        return f"{COLLECTION_PREFIX}_{version}"
+
+    def create_collection(self, version):
+        chroma_collection = self.client.get_or_create_collection(self.collection_name(version))
+        vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
+        storage_context = StorageContext.from_defaults(vector_store=vector_store)
+        return vector_store, storage_context
+
     def setup(self):
         self.engine = self.database_connection()
         self.load_llms()
-        self.client, self.chroma_collection, self.vector_store, self.storage_context = self.chroma()
-        self.database_indexer = indexer.DatabaseIndexer(self.logger, self.google_api_keys, self.llm_model, self.embedding_model)
+        self.client, self.summary_collection = self.chroma()
+        self.database_indexer = indexer.DatabaseIndexer(self.logger, self.google_api_keys, self.llm_model, self.embedding_model, self.summary_collection, self.scheduler)
         self.create_index_and_pipelines()
 
     def create_index_and_pipelines(self):
         Settings.embed_model = self.database_indexer.get_next_models()[1]
 
-        index = self.database_indexer.run(self.engine, self.storage_context)
-        for _ in range(self.pipeline_pool.maxlen):
-            llm = self.get_next_llm()
-            query_pipeline = pipeline._build_query_pipeline(self.engine, self.vector_store, llm)
-            qb_lock = threading.Lock()
-            self.pipeline_pool.append((query_pipeline, llm, qb_lock))
-            self.qb_locks.append(qb_lock)
-        self.logger.info(f"Created pipeline pool with {len(self.pipeline_pool)} pipelines")
-
-    def get_next_pipeline(self):
-        query_pipeline, llm, qb_lock = self.pipeline_pool[0]
-        Settings.llm = llm
-        self.pipeline_pool.rotate(-1)
-        return query_pipeline, llm, qb_lock
+        pipeline_pool = self.build_generation(self.version)
+        self.activate_generation(self.version, pipeline_pool)
+        self.logger.info(f"Created pipeline pool with {len(pipeline_pool)} pipelines")
 
-    def rebuild_index_and_pipeline(self):
-        self.logger.info("Rebuilding index and query pipeline pool")
-        new_pipeline_pool = deque(maxlen=self.pipeline_pool.maxlen)
+    def build_generation(self, version):
+        vector_store, storage_context = self.create_collection(version)
+        try:
+            index, table_infos = self.database_indexer.run(self.engine, storage_context)
+            sql_database = SQLDatabase(self.engine)
+            table_contexts = pipeline.build_table_contexts(sql_database, table_infos)
+            self.logger.info(f"Precomputed schema context for {len(table_contexts)} tables")
+            return [
+                (*pipeline._build_query_pipeline(sql_database, table_contexts, self.result_cache, self.template_cache, vector_store, llm, embed_model), llm)
+                for llm, embed_model in zip(self.llm_pool, self.embed_pool)
+            ]
+        except Exception:
+            self.client.delete_collection(self.collection_name(version))
+            raise
 
-        index = self.database_indexer.run(self.engine, self.storage_context)
-        for i in range(self.pipeline_pool.maxlen):
-            _, llm, qb_lock = self.get_next_pipeline()
-            Settings.llm = llm
-            query_pipeline = pipeline._build_query_pipeline(self.engine, self.vector_store, llm)
-            new_pipeline_pool.append((query_pipeline, llm, qb_lock))
+    def activate_generation(self, version, pipeline_pool):
+        with self.generation_lock:
+            previous = self.generation
+            self.generation = (version, pipeline_pool)
+            self.version = version
+            self.result_cache.clear()
+            self.template_cache.clear()
+            self.in_flight[version] = 0
+            if previous:
+                self.retired.add(previous[0])
+        if previous:
+            self.release_generation(previous[0], leased=False)
+            if self.on_activate:
+                self.on_activate(version)
+
+    def acquire_generation(self):
+        with self.generation_lock:
+            version, pipeline_pool = self.generation
+            self.in_flight[version] += 1
+            return version, pipeline_pool
+
+    def release_generation(self, version, leased=True):
+        with self.generation_lock:
+            if leased:
+                self.in_flight[version] -= 1
+            if version not in self.retired or self.in_flight[version]:
+                return
+            self.retired.discard(version)
+            del self.in_flight[version]
+        self.client.delete_collection(self.collection_name(version))
+        self.logger.info(f"Dropped index generation {version}")
+
+    def get_next_pipeline(self, exclude=()):
+        return self.scheduler.acquire(exclude, exclusive=True)
+
+    def rebuild_index_and_pipeline(self):
+        version = self.version + 1
+        self.logger.info(f"Building index generation {version} in a shadow collection")
 
-        self.pipeline_pool = new_pipeline_pool
-        self.logger.info("Rebuild complete. New pipeline pool created.")
+        pipeline_pool = self.build_generation(version)
+        self.activate_generation(version, pipeline_pool)
+        self.logger.info(f"Rebuild complete. Switched queries to index generation {version}.")
 
     def trigger_rebuild(self):
         try:
@@ -184,17 +241,11 @@ class LLM:
                 current_time = time.time()
                 
                 if current_time - self.last_rebuild_time >= self.rebuild_interval:
-                    with ExitStack() as stack:
-                        for lock in self.qb_locks:
-                            stack.enter_context(lock)
-                        
-                        self.rebuild_index_and_pipeline()
-                        self.last_rebuild_time = current_time
-                        
-                        while not self.rebuild_queue.empty():
-                            self.rebuild_queue.get_nowait()
-                    
-                    self.version += 1
+                    while not self.rebuild_queue.empty():
+                        self.rebuild_queue.get_nowait()
+
+                    self.rebuild_index_and_pipeline()
+                    self.last_rebuild_time = current_time
                 else:
                     self.rebuild_queue.put(rebuild_time)
             except queue.Empty:
@@ -202,39 +253,65 @@ class LLM:
             except Exception as e:
                 self.logger.error(f"An error occurred in rebuild thread: {e}")
 
+    def submit(self, query_text):
+        future = Future()
+        self.query_queue.put((query_text, future))
+        return future
+
     def query(self, query_text):
-        future = threading.Event()
-        result = []
-        self.query_queue.put((query_text, future, result))
-        future.wait()
-        return result[0]
+        return self.submit(query_text).result()
+
+    async def aquery(self, query_text):
+        return await asyncio.wrap_future(self.submit(query_text))
+
+    def run_pipelines(self, query_pipeline, sql_pipeline, query_text):
+        template, params = self.template_cache.parameterize(query_text)
+        sql_query = self.template_cache.lookup(template, params)
+        if sql_query is not None:
+            self.template_cache.start(bound=True)
+            try:
+                return str(sql_pipeline.run(query=query_text, sql_query=sql_query))
+            except TemplateMismatch:
+                self.template_cache.forget(template)
+
+        self.template_cache.start()
+        response = str(query_pipeline.run(query=query_text))
+        self.template_cache.learn(template, params)
+        return response
 
     def process_queries(self):
         while self.running:
-            query_text, event, result = self.query_queue.get()
+            query_text, future = self.query_queue.get()
             if query_text is None:
                 break
-
-            query_pipeline, llm, qb_lock = self.get_next_pipeline()
-            Settings.llm = llm
-
-            response = False
-            while not response:
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            slot = None
+            for attempt in range(self.query_max_retries + 1):
+                slot = self.get_next_pipeline(exclude=(slot,))
+                version, pipeline_pool = self.acquire_generation()
+                started = time.monotonic()
                 try:
-                    with qb_lock:
-                        response = str(query_pipeline.run(query=query_text))
+                    query_pipeline, sql_pipeline, _ = pipeline_pool[slot]
+                    response = self.run_pipelines(query_pipeline, sql_pipeline, query_text)
+                    self.scheduler.release(slot, started)
+                    future.set_result((response, version))
+                    break
                 except Exception as e:
                     print(f"Received Error: {e}. Retrying with different pipeline.")
-                    query_pipeline, llm, qb_lock = self.get_next_pipeline()
-                    Settings.llm = llm
-
-            current_version = self.version
-            result.append((response, current_version))
-            event.set()
+                    self.scheduler.release(slot, started, e)
+                    error = e
+                finally:
+                    self.release_generation(version)
+            else:
+                future.set_exception(error)
 
     def stop(self):
         self.running = False
-        self.query_queue.put((None, None, None))
+        for _ in self.query_threads:
+            self.query_queue.put((None, None))
         self.listen_rebuild_thread.join()
-        self.query_thread.join()
+        for query_thread in self.query_threads:
+            query_thread.join()
         self.logger.info("RunLLM has stopped.")
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
+from typing import Optional
 from llm import LLM
 from unimap import UniMap 
 import httpx
@@ -16,14 +18,29 @@ unimap_instance = UniMap()
 CACHE_ENGINE_URL = os.environ['CACHE_ENGINE_URL']
 logger.info(f"CACHE_ENGINE_URL: {CACHE_ENGINE_URL}")
 
+def flush_cache_engine(version):
+    try:
+        response = httpx.post(f"{CACHE_ENGINE_URL}/flush_all_data")
+        response.raise_for_status()
+        logger.info(f"Cache data flushed for index generation {version}")
+    except Exception as e:
+        logger.error(f"Error flushing cache data for index generation {version}: {str(e)}")
+
+llm_instance.on_activate = flush_cache_engine
+
 class QueryRequest(BaseModel):
     query: str
 
+class DataChangeRequest(BaseModel):
+    university_id: str
+    table_name: Optional[str] = None
+
 class CacheRequest(BaseModel):
     university_id: str
     query: str
     response: str
     version: str
+    query_vector: Optional[str] = None
 
 async def get_cached_response(university_id: str, query: str):
     async with httpx.AsyncClient() as client:
@@ -42,12 +59,13 @@ async def get_cached_response(university_id: str, query: str):
             logger.error(f"Unexpected error occurred: {e}")
             raise HTTPException(status_code=500, detail=f"Unexpected error while fetching cached response: {str(e)}")
 
-async def cache_response(university_id: str, query: str, response: str, version: int):
+async def cache_response(university_id: str, query: str, response: str, version: int, query_vector: Optional[str] = None):
     cache_request = CacheRequest(
         university_id=university_id,
         query=query,
         response=response,
-        version=str(version)
+        version=str(version),
+        query_vector=query_vector
     )
     async with httpx.AsyncClient() as client:
         try:
@@ -64,9 +82,8 @@ async def cache_response(university_id: str, query: str, response: str, version:
 @app.post("/query")
 async def query(query_request: QueryRequest):
     try:
-        university_id = unimap_instance.process_query(query_request.query)
+        university_id = await unimap_instance.aprocess_query(query_request.query)
 
-        query = query_request.query
         if university_id == '$':
             logger.warning(f"No university found in query: {query_request.query}")
             university_id = "UNKNOWN"
@@ -76,10 +93,11 @@ async def query(query_request: QueryRequest):
             query_request.query = formatted_query
 
         logger.info("Checking for Cache...")
-        cached_response = await get_cached_response(university_id, query_request.query)
+        cache_lookup = await get_cached_response(university_id, query_request.query)
+        cached_response = cache_lookup["results"]
         
         if cached_response and cached_response[0]["similarity"] >= 0.60:
-            logger.info(f"Cache hit with similarity: {cached_response[0]['similarity']}")
+            logger.info(f"Cache hit ({cache_lookup.get('tier', 'semantic')} tier) with similarity: {cached_response[0]['similarity']}")
             return {
                 "response": cached_response[0]["response"],
                 "version": "cached",
@@ -94,10 +112,13 @@ async def query(query_request: QueryRequest):
             logger.info("Cache miss: No cached response found")
             
         logger.info("Getting response from ai-engine...")
-        response, version = llm_instance.query(query_request.query)
+        response, version = await llm_instance.aquery(query_request.query)
         
-        logger.info("Caching the response...")
-        await cache_response(university_id, query, response, version)
+        if version == llm_instance.version:
+            logger.info("Caching the response...")
+            await cache_response(university_id, query_request.query, response, version, cache_lookup["query_vector"])
+        else:
+            logger.info(f"Not caching a response from superseded index generation {version}")
         
         return {
             "response": response,
@@ -114,25 +135,33 @@ async def query(query_request: QueryRequest):
 def health_check():
     return {"status": "healthy", "llm_id": os.environ['LLM_ID']}
 
+@app.get("/metrics")
+def metrics():
+    llm_instance.scheduler.refresh_metrics()
+    unimap_instance.scheduler.refresh_metrics()
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/rebuild")
 async def rebuild():
     try:
-        async with httpx.AsyncClient() as client:
-            flush_response = await client.post(f"{CACHE_ENGINE_URL}/flush_all_data")
-            flush_response.raise_for_status()
-            logger.info("Cache data flushed successfully")
-
         llm_instance.trigger_rebuild()
         logger.info("LLM rebuild initiated")
 
-        return {"status": "Cache flushed and rebuild initiated"}
-    except httpx.HTTPStatusError as e:
-        logger.error(f"HTTP error occurred while flushing cache: {e}")
-        raise HTTPException(status_code=e.response.status_code, detail=f"Error flushing cache: {e.response.text}")
+        return {"status": "Rebuild initiated, cache is flushed when the new index is activated"}
     except Exception as e:
         logger.error(f"Error during rebuild process: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error during rebuild process: {str(e)}")
     
+@app.post("/data_changed")
+def data_changed(data_change: DataChangeRequest):
+    try:
+        llm_instance.result_cache.invalidate(data_change.university_id, data_change.table_name)
+        return {"status": "SQL result cache invalidated"}
+    except Exception as e:
+        logger.error(f"Error invalidating SQL result cache: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error invalidating SQL result cache: {str(e)}")
+    
 @app.on_event("shutdown")
 def shutdown_event():
+    unimap_instance.stop()
     llm_instance.stop()
\ No newline at end of file
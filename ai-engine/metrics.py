@@ -0,0 +1,32 @@
+from prometheus_client import Counter, Gauge
+
+KEY_REQUESTS = Counter(
+    "ai_engine_key_requests_total",
+    "LLM calls per API key slot by outcome (success, error or rate_limited)",
+    ["pool", "slot", "outcome"],
+)
+KEY_STATE = Gauge(
+    "ai_engine_key_circuit_state",
+    "Circuit breaker state per API key slot (0 closed, 1 half-open, 2 open)",
+    ["pool", "slot"],
+)
+KEY_IN_FLIGHT = Gauge(
+    "ai_engine_key_in_flight",
+    "LLM calls currently leased to each API key slot",
+    ["pool", "slot"],
+)
+KEY_LATENCY = Gauge(
+    "ai_engine_key_latency_seconds",
+    "Exponentially weighted latency of successful calls per API key slot",
+    ["pool", "slot"],
+)
+KEY_ERROR_RATE = Gauge(
+    "ai_engine_key_error_rate",
+    "Exponentially weighted error rate per API key slot",
+    ["pool", "slot"],
+)
+KEY_COOLDOWN = Gauge(
+    "ai_engine_key_cooldown_seconds",
+    "Seconds until an open or rate-limited API key slot is routable again",
+    ["pool", "slot"],
+)
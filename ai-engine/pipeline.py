@@ -1,30 +1,54 @@
-from llama_index.core import SQLDatabase, VectorStoreIndex
-from llama_index.core.retrievers import SQLRetriever
+from llama_index.core import VectorStoreIndex
+from llama_index.core.retrievers import BaseRetriever, SQLRetriever
 from llama_index.core.query_pipeline import FnComponent, QueryPipeline
 from llama_index.core.prompts.default_prompts import DEFAULT_TEXT_TO_SQL_PROMPT
 from llama_index.core import PromptTemplate
 from llama_index.core.llms import ChatResponse
 from llama_index.core.query_pipeline import InputComponent
 
-def _build_query_pipeline(engine, vector_store, llm):
-    sql_database = SQLDatabase(engine)
-    sql_retriever = SQLRetriever(sql_database)
+def build_table_contexts(sql_database, table_infos):
+    table_contexts = {}
+    for table_info in table_infos:
+        table_context = sql_database.get_single_table_info(table_info.table_name)
+        if table_info.table_summary:
+            table_context += " The table description is: " + table_info.table_summary
+        table_contexts[table_info.table_name] = table_context
+    return table_contexts
 
-    index = VectorStoreIndex.from_vector_store(vector_store)
+class CachedSQLRetriever(BaseRetriever):
+    def __init__(self, sql_retriever, result_cache, template_cache, table_names):
+        super().__init__()
+        self.sql_retriever = sql_retriever
+        self.result_cache = result_cache
+        self.template_cache = template_cache
+        self.table_names = table_names
+
+    def _retrieve(self, query_bundle):
+        key = self.result_cache.key(query_bundle.query_str, self.table_names)
+        nodes = self.result_cache.get(key) if key else None
+        if nodes is not None:
+            self.template_cache.record_result(True)
+            return nodes
+
+        nodes = self.sql_retriever.retrieve(query_bundle)
+        validated = bool(nodes) and all("sql_query" in node.metadata for node in nodes)
+        self.template_cache.record_result(validated)
+        if validated and key:
+            size = sum(len(node.text) + len(repr(node.metadata)) for node in nodes)
+            self.result_cache.put(key, nodes, size)
+        return nodes
+
+def _build_query_pipeline(sql_database, table_contexts, result_cache, template_cache, vector_store, llm, embed_model):
+    sql_retriever = CachedSQLRetriever(SQLRetriever(sql_database), result_cache, template_cache, list(table_contexts))
+
+    index = VectorStoreIndex.from_vector_store(vector_store, embed_model=embed_model)
     obj_retriever = index.as_retriever(similarity_top_k=3)
 
     def get_table_context_str(table_schema_objs):
-        context_strs = []
-        for table_schema_obj in table_schema_objs:
-            table_info = sql_database.get_single_table_info(
-                table_schema_obj.metadata['table_name']
-            )
-            if table_schema_obj.text:
-                table_opt_context = " The table description is: "
-                table_opt_context += table_schema_obj.text.split("Table Summary: ")[1]
-                table_info += table_opt_context
-            context_strs.append(table_info)
-        return "\n\n".join(context_strs)
+        return "\n\n".join(
+            table_contexts[table_schema_obj.metadata['table_name']]
+            for table_schema_obj in table_schema_objs
+        )
     
     table_parser_component = FnComponent(fn=get_table_context_str)
 
@@ -42,12 +66,13 @@ def _build_query_pipeline(engine, vector_store, llm):
         if response.lower().startswith('sql'):
             response = response[3:].lstrip()
         
+        template_cache.record_sql(response)
         return response
     
     sql_parser_component = FnComponent(fn=parse_response_to_sql)
 
     text2sql_prompt = DEFAULT_TEXT_TO_SQL_PROMPT.partial_format(
-        dialect=engine.dialect.name
+        dialect=sql_database.dialect
     )
 
     response_synthesis_prompt_str = (
@@ -91,4 +116,24 @@ def _build_query_pipeline(engine, vector_store, llm):
     qp.add_link("input", "response_synthesis_prompt", dest_key="query_str")
     qp.add_link("response_synthesis_prompt", "response_synthesis_llm")
 
-    return qp
\ No newline at end of file
+    sql_qp = QueryPipeline(
+        modules={
+            "input": InputComponent(),
+            "sql_retriever": sql_retriever,
+            "response_synthesis_prompt": response_synthesis_prompt,
+            "response_synthesis_llm": llm,
+        },
+        verbose=False,
+    )
+
+    sql_qp.add_link("input", "sql_retriever", src_key="sql_query")
+    sql_qp.add_link(
+        "input", "response_synthesis_prompt", src_key="sql_query", dest_key="sql_query"
+    )
+    sql_qp.add_link(
+        "sql_retriever", "response_synthesis_prompt", dest_key="context_str"
+    )
+    sql_qp.add_link("input", "response_synthesis_prompt", src_key="query", dest_key="query_str")
+    sql_qp.add_link("response_synthesis_prompt", "response_synthesis_llm")
+
+    return qp, sql_qp
\ No newline at end of file
@@ -0,0 +1,34 @@
+import random
+import threading
+import time
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        with self.lock:
+            self.refill()
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+def backoff_delay(attempt, base, cap):
+    return random.uniform(0, min(cap, base * 2 ** attempt))
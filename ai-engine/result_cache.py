@@ -0,0 +1,109 @@
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+UNIVERSITY_COLUMN = "uni_id"
+QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+QUOTED_IDENTIFIER = re.compile(r'"((?:[^"]|"")*)"')
+UNIVERSITY_FILTER = re.compile(r"\b" + UNIVERSITY_COLUMN + r"\s*(?:=\s*('(?:[^']|'')*')|in\s*\(((?:\s*'(?:[^']|'')*'\s*,?)+)\))")
+LITERAL = re.compile(r"'((?:[^']|'')*)'")
+
+def normalize_sql(sql):
+    parts = QUOTED.split(sql.strip().rstrip(";").strip())
+    return "".join(
+        part if index % 2 else re.sub(r"\s*([=<>!,()*+/-])\s*", r"\1", re.sub(r"\s+", " ", part.lower()))
+        for index, part in enumerate(parts)
+    )
+
+def unquoted(sql):
+    return " ".join(part for index, part in enumerate(QUOTED.split(sql)) if index % 2 == 0)
+
+class SQLResultCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.used = 0
+        self.table_versions = defaultdict(int)
+        self.scoped_versions = defaultdict(int)
+        self.university_versions = defaultdict(int)
+        self.epoch = 0
+        self.lock = threading.Lock()
+
+    def tables_in(self, sql, table_names):
+        sql = STRING_LITERAL.sub(" ", sql)
+        identifiers = {identifier.replace('""', '"') for identifier in QUOTED_IDENTIFIER.findall(sql)}
+        words = set(re.findall(r"[a-z_][a-z0-9_$]*", QUOTED_IDENTIFIER.sub(" ", sql)))
+        return sorted(table_name for table_name in table_names if table_name in identifiers or table_name.lower() in words)
+
+    def universities_in(self, sql):
+        if re.search(r"\bor\b", unquoted(sql)):
+            return []
+        universities = set()
+        for equals, members in UNIVERSITY_FILTER.findall(sql):
+            for literal in LITERAL.findall(equals or members):
+                universities.add(literal.replace("''", "'"))
+        return sorted(universities)
+
+    def key(self, sql, table_names):
+        sql = normalize_sql(sql)
+        tables = self.tables_in(sql, table_names)
+        if not tables:
+            return None
+        universities = self.universities_in(sql)
+        with self.lock:
+            versions = tuple(
+                (university_id, table_name, self.stamp(university_id, table_name))
+                for university_id in universities or [None]
+                for table_name in tables
+            )
+            return sql, self.epoch, versions
+
+    def stamp(self, university_id, table_name):
+        if university_id is None:
+            return self.table_versions[table_name]
+        return self.university_versions[university_id], self.scoped_versions[(university_id, table_name)]
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.used -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.used += size
+            while self.used > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.used -= evicted_size
+
+    def invalidate(self, university_id, table_name=None):
+        with self.lock:
+            if table_name:
+                self.scoped_versions[(university_id, table_name)] += 1
+                self.table_versions[table_name] += 1
+            else:
+                self.university_versions[university_id] += 1
+                self.epoch += 1
+            self.drop_stale()
+
+    def drop_stale(self):
+        for key in list(self.entries):
+            _, epoch, versions = key
+            if epoch != self.epoch or any(
+                stamp != self.stamp(university_id, table_name)
+                for university_id, table_name, stamp in versions
+            ):
+                self.used -= self.entries.pop(key)[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used = 0
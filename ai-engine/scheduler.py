@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+
+from metrics import KEY_COOLDOWN, KEY_ERROR_RATE, KEY_IN_FLIGHT, KEY_LATENCY, KEY_REQUESTS, KEY_STATE
+
+CLOSED = 0
+HALF_OPEN = 1
+OPEN = 2
+
+def is_rate_limited(error):
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+class KeyHealth:
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.failures = 0
+        self.state = CLOSED
+        self.available_at = 0.0
+
+class KeyScheduler:
+    def __init__(self, pool, size):
+        self.pool = pool
+        self.keys = [KeyHealth() for _ in range(size)]
+        self.alpha = float(os.environ['KEY_EWMA_ALPHA'])
+        self.failure_threshold = int(os.environ['KEY_FAILURE_THRESHOLD'])
+        self.open_seconds = float(os.environ['KEY_OPEN_SECONDS'])
+        self.rate_limit_cooldown = float(os.environ['KEY_RATE_LIMIT_COOLDOWN'])
+        self.condition = threading.Condition()
+        for slot in range(size):
+            self.export(slot, 0.0)
+
+    def load(self, slot):
+        key = self.keys[slot]
+        return (key.in_flight + 1) * key.latency * (1 + key.error_rate), key.in_flight
+
+    def is_available(self, slot, now, exclusive=False):
+        key = self.keys[slot]
+        if now < key.available_at:
+            return False
+        return key.in_flight == 0 or (key.state == CLOSED and not exclusive)
+
+    def pick(self, exclude, now, exclusive=False, delay=None):
+        slots = [slot for slot in range(len(self.keys)) if self.is_available(slot, now, exclusive)]
+        preferred = [slot for slot in slots if slot not in exclude] or slots
+        if not preferred:
+            return None
+        if delay:
+            return min(preferred, key=lambda slot: (delay(slot), self.load(slot)))
+        return min(preferred, key=self.load)
+
+    def choose(self, exclude=()):
+        with self.condition:
+            slot = self.pick(exclude, time.monotonic())
+            if slot is None:
+                slot = min(range(len(self.keys)), key=lambda slot: self.keys[slot].available_at)
+            return slot
+
+    def acquire(self, exclude=(), exclusive=False, delay=None):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                slot = self.pick(exclude, now, exclusive, delay)
+                if slot is not None:
+                    key = self.keys[slot]
+                    if key.state == OPEN:
+                        key.state = HALF_OPEN
+                    key.in_flight += 1
+                    self.export(slot, now)
+                    return slot
+                wait = min(key.available_at for key in self.keys) - now
+                self.condition.wait(wait if wait > 0 else None)
+
+    def release(self, slot, started, error=None):
+        now = time.monotonic()
+        with self.condition:
+            key = self.keys[slot]
+            key.in_flight -= 1
+            key.error_rate += self.alpha * ((error is not None) - key.error_rate)
+            if error is None:
+                outcome = "success"
+                key.latency = now - started if not key.latency else key.latency + self.alpha * (now - started - key.latency)
+                key.failures = 0
+                key.state = CLOSED
+            elif is_rate_limited(error):
+                outcome = "rate_limited"
+                key.available_at = now + self.rate_limit_cooldown
+                if key.state == HALF_OPEN:
+                    key.state = OPEN
+            else:
+                outcome = "error"
+                key.failures += 1
+                if key.state == HALF_OPEN or key.failures >= self.failure_threshold:
+                    if key.state != OPEN:
+                        print(f"Opening circuit for {self.pool} key {slot} after {key.failures} consecutive failures.")
+                    key.state = OPEN
+                    key.available_at = now + self.open_seconds
+            KEY_REQUESTS.labels(pool=self.pool, slot=str(slot), outcome=outcome).inc()
+            self.export(slot, now)
+            self.condition.notify_all()
+
+    def export(self, slot, now):
+        key = self.keys[slot]
+        KEY_STATE.labels(pool=self.pool, slot=str(slot)).set(key.state)
+        KEY_IN_FLIGHT.labels(pool=self.pool, slot=str(slot)).set(key.in_flight)
+        KEY_LATENCY.labels(pool=self.pool, slot=str(slot)).set(key.latency)
+        KEY_ERROR_RATE.labels(pool=self.pool, slot=str(slot)).set(key.error_rate)
+        KEY_COOLDOWN.labels(pool=self.pool, slot=str(slot)).set(max(0.0, key.available_at - now))
+
+    def refresh_metrics(self):
+        with self.condition:
+            now = time.monotonic()
+            for slot in range(len(self.keys)):
+                self.export(slot, now)
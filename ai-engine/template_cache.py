@@ -0,0 +1,128 @@
+import re
+import threading
+from collections import OrderedDict
+
+UNIVERSITY_CONTEXT = re.compile(r"\. The name of the university is (?P<university_name>.+) and the associated id is (?P<university_id>\S+)$")
+UNIVERSITY_TEMPLATE = ". The name of the university is {university_name} and the associated id is {university_id}"
+STRING_LITERAL = re.compile(r"'([^']+)'|\"([^\"]+)\"")
+NUMBER_LITERAL = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+SQL_STRING = re.compile(r"('(?:[^']|'')*')")
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+class TemplateMismatch(Exception):
+    pass
+
+def bounded(value):
+    return re.compile(r"(?<![\w.])" + re.escape(value) + r"(?![\w.])")
+
+class TemplateCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.recorded = threading.local()
+
+    def parameterize(self, question):
+        params = {}
+        match = UNIVERSITY_CONTEXT.search(question)
+        if match:
+            params.update(match.groupdict())
+            question = question[:match.start()]
+            for name in ("university_name", "university_id"):
+                question = re.sub(r"(?<!\w)" + re.escape(params[name]) + r"(?!\w)", "{" + name + "}", question, flags=re.IGNORECASE)
+
+        def string_literal(match):
+            name = f"s{sum(key.startswith('s') for key in params)}"
+            params[name] = match.group(1) or match.group(2)
+            return "{" + name + "}"
+
+        def number_literal(match):
+            name = f"n{sum(key.startswith('n') for key in params)}"
+            params[name] = match.group(0)
+            return "{" + name + "}"
+
+        question = STRING_LITERAL.sub(string_literal, question)
+        question = NUMBER_LITERAL.sub(number_literal, question)
+        template = re.sub(r"\s+", " ", question.casefold()).strip()
+        if match:
+            template += UNIVERSITY_TEMPLATE
+        return template, params
+
+    def lookup(self, template, params):
+        with self.lock:
+            sql_template = self.entries.get(template)
+            if sql_template is None:
+                return None
+            self.entries.move_to_end(template)
+        return self.bind(sql_template, params)
+
+    def bind(self, sql_template, params):
+        def value(match):
+            name = match.group(1)
+            return params[name] if name.startswith("n") else params[name].replace("'", "''")
+        return PLACEHOLDER.sub(value, sql_template)
+
+    def templatize(self, sql, params):
+        values = list(params.values())
+        if "{" in sql or len(set(values)) != len(values):
+            return None
+
+        parts = SQL_STRING.split(sql)
+        matches = dict.fromkeys(params, 0)
+        for name, value in params.items():
+            pattern = bounded(value.replace("'", "''"))
+            for index, part in enumerate(parts):
+                if index % 2 == 0 and not name.startswith("n"):
+                    continue
+                parts[index], count = pattern.subn("{" + name + "}", part)
+                matches[name] += count
+
+        sql_template = "".join(parts)
+        if any(count > 1 for count in matches.values()):
+            return None
+        required = set(params) - {"university_name"}
+        if any(not matches[name] for name in required):
+            return None
+        if any(
+            re.search(bounded(value).pattern, sql_template, flags=re.IGNORECASE)
+            for name, value in params.items() if not name.startswith("n")
+        ):
+            return None
+        return sql_template
+
+    def start(self, bound=False):
+        self.recorded.sql = None
+        self.recorded.validated = False
+        self.recorded.bound = bound
+
+    def record_sql(self, sql):
+        self.recorded.sql = sql
+
+    def record_result(self, validated):
+        self.recorded.validated = validated
+        if not validated and getattr(self.recorded, "bound", False):
+            raise TemplateMismatch()
+
+    def validated(self):
+        return getattr(self.recorded, "validated", False)
+
+    def learn(self, template, params):
+        sql = getattr(self.recorded, "sql", None)
+        if not sql or not self.validated():
+            return
+        sql_template = self.templatize(sql, params)
+        if sql_template is None:
+            return
+        with self.lock:
+            self.entries[template] = sql_template
+            self.entries.move_to_end(template)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def forget(self, template):
+        with self.lock:
+            self.entries.pop(template, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
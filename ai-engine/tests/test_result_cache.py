@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_cache import SQLResultCache
+
+TABLES = ["event", "team"]
+
+def cached(cache, sql, value="rows"):
+    key = cache.key(sql, TABLES)
+    cache.put(key, value, 10)
+    return key
+
+def test_quoted_table_is_versioned():
+    cache = SQLResultCache(1024)
+    sql = "SELECT COUNT(*) FROM \"event\" WHERE uni_id='U1'"
+    cached(cache, sql)
+    assert cache.get(cache.key(sql, TABLES)) == "rows"
+
+    cache.invalidate("U1", "event")
+    assert cache.get(cache.key(sql, TABLES)) is None
+
+def test_unknown_table_is_not_cached():
+    cache = SQLResultCache(1024)
+    assert cache.key("SELECT 1", TABLES) is None
+    assert cache.key("SELECT COUNT(*) FROM \"Event\" WHERE uni_id='U1'", TABLES) is None
+
+def test_university_filter_needs_exact_column():
+    cache = SQLResultCache(1024)
+    assert cache.universities_in("select * from team where parent_uni_id='U1'") == []
+    assert cache.universities_in("select * from team t where t.uni_id='U1'") == ["U1"]
+
+def test_other_university_change_does_not_invalidate_scoped_result():
+    cache = SQLResultCache(1024)
+    sql = "SELECT COUNT(*) FROM event WHERE uni_id='U1'"
+    cached(cache, sql)
+
+    cache.invalidate("U2", "event")
+    assert cache.get(cache.key(sql, TABLES)) == "rows"
+
+def test_parent_filter_is_invalidated_by_any_university():
+    cache = SQLResultCache(1024)
+    sql = "SELECT COUNT(*) FROM team WHERE parent_uni_id='U1'"
+    cached(cache, sql)
+
+    cache.invalidate("U2", "team")
+    assert cache.get(cache.key(sql, TABLES)) is None
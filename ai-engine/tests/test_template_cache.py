@@ -0,0 +1,57 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from template_cache import TemplateCache, TemplateMismatch
+
+def question(text, university_name, university_id):
+    return f"{text}. The name of the university is {university_name} and the associated id is {university_id}"
+
+def learned(cache, text, sql):
+    template, params = cache.parameterize(text)
+    cache.start()
+    cache.record_sql(sql)
+    cache.record_result(True)
+    cache.learn(template, params)
+    return template, params
+
+def test_template_binds_new_parameters():
+    cache = TemplateCache(8)
+    learned(
+        cache,
+        question("Which teams have more than 3 members", "Test University", "U1"),
+        "SELECT team FROM member WHERE uni_id='U1' GROUP BY team HAVING COUNT(*) > 3",
+    )
+
+    template, params = cache.parameterize(question("Which teams have more than 5 members", "Other University", "U2"))
+    assert cache.lookup(template, params) == "SELECT team FROM member WHERE uni_id='U2' GROUP BY team HAVING COUNT(*) > 5"
+
+def test_value_matching_more_than_once_is_not_learned():
+    cache = TemplateCache(8)
+    template, params = learned(
+        cache,
+        question("Which teams have more than 1 member", "Test University", "U1"),
+        "SELECT team FROM member WHERE uni_id='U1' GROUP BY team HAVING COUNT(*) > 1 LIMIT 1",
+    )
+    assert cache.lookup(template, params) is None
+
+def test_university_id_matching_more_than_once_is_not_learned():
+    cache = TemplateCache(8)
+    template, params = learned(
+        cache,
+        question("How many events are there", "Test University", "U1"),
+        "SELECT COUNT(*) FROM event WHERE uni_id='U1' OR host_id='U1'",
+    )
+    assert cache.lookup(template, params) is None
+
+def test_failed_bound_template_aborts_before_synthesis():
+    cache = TemplateCache(8)
+    cache.start(bound=True)
+    with pytest.raises(TemplateMismatch):
+        cache.record_result(False)
+
+    cache.start()
+    cache.record_result(False)
+    assert not cache.validated()
@@ -1,21 +1,22 @@
+import asyncio
 import json
 import time
 import os
 import yaml
-from collections import deque
-from llama_index.core import Document, VectorStoreIndex, Settings
+from concurrent.futures import ThreadPoolExecutor
+from llama_index.core import Document, VectorStoreIndex
 from llama_index.llms.gemini import Gemini
 from llama_index.embeddings.gemini import GeminiEmbedding
+from scheduler import KeyScheduler
 
 class UniMap:
     def __init__(self):        
         self.load_config()
-        
-        self.current_llm = None
-        self.current_embedding_model = None
-        self.load_next_model()
+        self.load_models()
+        self.scheduler = KeyScheduler("unimap", len(self.models))
         
         self.index = self.create_index()
+        self.executor = ThreadPoolExecutor(max_workers=int(os.environ['UNIMAP_WORKERS']))
 
     def load_config(self):
         config_file = os.environ['CONFIG_FILE']
@@ -23,24 +24,24 @@ class UniMap:
         with open(config_file, 'r') as f:
             config = yaml.safe_load(f)
 
-        self.google_api_keys = deque(config['api_keys']['unimap']['google_api_keys'])
+        self.google_api_keys = config['api_keys']['unimap']['google_api_keys']
         self.hashmap = config['universities']
         self.llm_model = "models/gemini-1.0-pro"
         self.embedding_model = "models/text-embedding-004"
 
-    def load_next_model(self):
+    def load_models(self):
         if not self.google_api_keys:
-            raise ValueError("No more API keys available")
-        
-        api_key = self.google_api_keys.popleft()
-        self.current_llm = Gemini(model_name=self.llm_model, api_key=api_key)
-        self.current_embedding_model = GeminiEmbedding(model_name=self.embedding_model, api_key=api_key)
-        
-        Settings.llm = self.current_llm
-        Settings.embed_model = self.current_embedding_model
-        
-        print("New Model Loaded")
-        self.google_api_keys.append(api_key) 
+            raise ValueError("No API keys available")
+
+        self.models = [
+            (Gemini(model_name=self.llm_model, api_key=api_key), GeminiEmbedding(model_name=self.embedding_model, api_key=api_key))
+            for api_key in self.google_api_keys
+        ]
+
+    def load_next_model(self, failed_slot=None):
+        slot = self.scheduler.acquire(exclude=(failed_slot,))
+        llm, embedding_model = self.models[slot]
+        return slot, llm, embedding_model
 
     def create_documents(self):
         documents = []
@@ -54,32 +55,36 @@ class UniMap:
         start_time = time.time()
         timeout = 120  # 2 minutes
 
+        slot = None
         while time.time() - start_time < timeout:
+            slot, llm, embedding_model = self.load_next_model(slot)
+            started = time.monotonic()
             try:
-                return operation(*args, **kwargs)
+                result = operation(llm, embedding_model, *args, **kwargs)
+                self.scheduler.release(slot, started)
+                return result
             except Exception as e:
                 print(f"Exception occurred: {str(e)}")
-                self.load_next_model() 
-                time.sleep(1)  
+                self.scheduler.release(slot, started, e)
 
         raise TimeoutError("Operation timed out after 2 minutes of retries")
 
     def create_index(self):
-        def _create_index():
+        def _create_index(llm, embedding_model):
             documents = self.create_documents()
-            return VectorStoreIndex.from_documents(documents)
+            return VectorStoreIndex.from_documents(documents, embed_model=embedding_model)
 
         return self.retry_with_timeout(_create_index)
 
+    def complete_university(self, llm, embedding_model, query):
+        response = llm.complete(
+            f"Extract the university name from this query, if any: '{query}'. "
+            "If no specific university is mentioned, say 'None'."
+        )
+        return response.text.strip()
+
     def extract_university(self, query):
-        def _extract_university():
-            response = self.current_llm.complete(
-                f"Extract the university name from this query, if any: '{query}'. "
-                "If no specific university is mentioned, say 'None'."
-            )
-            return response.text.strip()
-
-        return self.retry_with_timeout(_extract_university)
+        return self.retry_with_timeout(self.complete_university, query)
     
     def get_university_name(self, university_id):
         for name, id in self.hashmap.items():
@@ -88,13 +93,13 @@ class UniMap:
         return "Unknown University"
 
     def process_query(self, query):
-        def _process_query():
-            university_name = self.extract_university(query)
+        def _process_query(llm, embedding_model):
+            university_name = self.complete_university(llm, embedding_model, query)
             
             if university_name.lower() == 'none':
                 return '$'
             else:
-                query_engine = self.index.as_query_engine()
+                query_engine = self.index.as_query_engine(llm=llm, embed_model=embedding_model)
                 response = query_engine.query(
                     f"Find the university ID for {university_name}. "
                     "Your response should must only include the university ID and strictly nothing more."
@@ -107,4 +112,11 @@ class UniMap:
                 except Exception:
                     return self.hashmap.get(university_name, '$')
 
-        return self.retry_with_timeout(_process_query)
\ No newline at end of file
+        return self.retry_with_timeout(_process_query)
+
+    async def aprocess_query(self, query):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.process_query, query)
+
+    def stop(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
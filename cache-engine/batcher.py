@@ -0,0 +1,74 @@
+import asyncio
+import time
+from metrics import EMBEDDING_BATCH_SIZE, EMBEDDING_QUEUE_WAIT
+
+class EmbeddingBatcher:
+    def __init__(self, encode_batch, max_batch_size, max_wait_ms, max_inflight_batches):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.inflight = asyncio.Semaphore(max_inflight_batches)
+        self.queue = None
+        self.worker = None
+        self.pending = set()
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+    async def encode(self, text):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def collect(self):
+        batch = [await self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self.collect()
+            await self.inflight.acquire()
+            task = asyncio.create_task(self.dispatch(batch))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+
+    async def dispatch(self, batch):
+        try:
+            dispatched_at = time.perf_counter()
+            EMBEDDING_BATCH_SIZE.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                EMBEDDING_QUEUE_WAIT.observe(dispatched_at - enqueued_at)
+
+            try:
+                vectors = await self.encode_batch([text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        finally:
+            self.inflight.release()
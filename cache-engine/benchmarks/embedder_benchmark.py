@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedders import OnnxEmbedder, TorchEmbedder, onnx_model_exists
+from export_onnx import export_model
+
+SAMPLE_QUERIES = [
+    "How many events does the university host each year?",
+    "List all the teams participating in the annual fest",
+    "Who is the head of the computer science department?",
+    "What was the budget for last year's cultural festival?",
+    "Show the number of students enrolled in each course",
+    "Which clubs organised more than five workshops?",
+    "When does the registration for the hackathon close?",
+    "What are the hostel fees for first-year students?",
+    "Give me the contact details of the placement office",
+    "Which faculty members supervise research projects in physics?",
+]
+
+def load_texts(path):
+    if not path:
+        return SAMPLE_QUERIES
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+def throughput(embedder, texts, batch_size, repeats):
+    embedder.encode(texts[:batch_size])
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for offset in range(0, len(texts), batch_size):
+            embedder.encode(texts[offset:offset + batch_size])
+        timings.append(time.perf_counter() - start)
+    return len(texts) / np.median(timings)
+
+def cosine_agreement(baseline, candidate):
+    baseline = baseline / np.linalg.norm(baseline, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = np.sum(baseline * candidate, axis=1)
+    top1 = np.mean(np.argmax(baseline @ baseline.T - 2 * np.eye(len(baseline)), axis=1) == np.argmax(candidate @ candidate.T - 2 * np.eye(len(candidate)), axis=1))
+    return cosines.mean(), cosines.min(), top1
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare encode throughput and cosine agreement of the PyTorch and ONNX embedder backends.")
+    parser.add_argument("--model", default=os.environ.get('EMBEDER', 'msmarco-distilbert-base-v4'))
+    parser.add_argument("--onnx-dir", default=os.environ.get('ONNX_MODEL_DIR', 'onnx'))
+    parser.add_argument("--texts", help="File with one query per line; defaults to a built-in sample")
+    parser.add_argument("--copies", type=int, default=20, help="How many times to repeat the text set")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts) * args.copies
+    if not onnx_model_exists(args.onnx_dir, quantized=True):
+        export_model(args.model, args.onnx_dir, quantize=True)
+
+    backends = {
+        "torch": TorchEmbedder(args.model),
+        "onnx": OnnxEmbedder(args.onnx_dir, False, args.threads),
+        "onnx-int8": OnnxEmbedder(args.onnx_dir, True, args.threads),
+    }
+
+    unique_texts = list(dict.fromkeys(texts))
+    baseline = backends["torch"].encode(unique_texts)
+
+    print(f"{'backend':>10} {'batch':>6} {'texts/s':>10} {'speedup':>8} {'mean cos':>9} {'min cos':>8} {'top-1':>6}")
+    for batch_size in args.batch_sizes:
+        baseline_rate = throughput(backends["torch"], texts, batch_size, args.repeats)
+        for name, embedder in backends.items():
+            rate = baseline_rate if name == "torch" else throughput(embedder, texts, batch_size, args.repeats)
+            mean_cos, min_cos, top1 = cosine_agreement(baseline, embedder.encode(unique_texts))
+            print(f"{name:>10} {batch_size:>6} {rate:>10.1f} {rate / baseline_rate:>7.2f}x {mean_cos:>9.4f} {min_cos:>8.4f} {top1:>6.2f}")
+
+if __name__ == "__main__":
+    main()
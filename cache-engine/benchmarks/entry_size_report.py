@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from codec import VECTOR_DTYPES, EntryCodec
+from similarity import SimilarityEngine
+
+SENTENCES = [
+    "The university hosts {n} events during its annual fest.",
+    "Team {n} is responsible for logistics and registration.",
+    "The fest was headed by team {n} in the year 20{n:02d}.",
+    "There are {n} participants registered across all events.",
+    "Event {n} is a technical competition organised by the computer science department.",
+]
+
+def synthetic_entries(count, dimension, rng):
+    centers = rng.standard_normal((max(count // 20, 1), dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, centers.shape[0], count)]
+    vectors += 0.3 * rng.standard_normal((count, dimension)).astype(np.float32)
+
+    entries = []
+    for i in range(count):
+        sentences = rng.choice(SENTENCES, size=rng.integers(2, 8))
+        response = " ".join(sentence.format(n=int(rng.integers(1, 99))) for sentence in sentences)
+        entries.append((f"How many events does university U{i % 50:03d} have in its fest?", response))
+    return entries, vectors
+
+def legacy_entry_size(query, response, vector):
+    return len(json.dumps({"query": query, "query_vector": vector.tolist(), "response": json.dumps(response)}))
+
+def compact_entry_size(codec, query, response, vector):
+    vector_bytes, _ = codec.encode_vector(vector)
+    size = len(query.encode()) + len(codec.encode_response(json.dumps(response))) + len(vector_bytes)
+    if codec.vector_type == "INT8":
+        size += 8
+    return size
+
+def index_accuracy(codec, vectors, queries, k):
+    reference = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    decoded = np.stack([codec.decode_vector(*codec.encode_vector(vector)) for vector in vectors])
+    decoded /= np.linalg.norm(decoded, axis=1, keepdims=True)
+    query_vectors = np.stack([codec.decode_vector(*codec.encode_vector(query)) for query in queries])
+    return compare(reference, decoded, queries, query_vectors, k)
+
+def matrix_accuracy(dtype, vectors, queries, k):
+    reference = SimilarityEngine(vectors.shape[1])
+    engine = SimilarityEngine(vectors.shape[1], dtype)
+    reference_matrix = reference.load_matrix(reference.to_row(vectors))
+    matrix = engine.load_matrix(engine.to_row(vectors))
+    agreement, recall, error = 0, 0, 0.0
+    for query in queries:
+        expected, expected_scores = reference.top_k(reference_matrix, query, k)
+        found, found_scores = engine.top_k(matrix, query, k)
+        agreement += expected[0] == found[0]
+        recall += len(set(expected) & set(found)) / k
+        error = max(error, float(np.max(np.abs(expected_scores - found_scores))))
+    return agreement / len(queries), recall / len(queries), error
+
+def compare(reference, decoded, queries, query_vectors, k):
+    agreement, recall, error = 0, 0, 0.0
+    for query, query_vector in zip(queries, query_vectors):
+        expected_scores = reference @ (query / np.linalg.norm(query))
+        found_scores = decoded @ (query_vector / np.linalg.norm(query_vector))
+        expected = np.argsort(expected_scores)[::-1][:k]
+        found = np.argsort(found_scores)[::-1][:k]
+        agreement += expected[0] == found[0]
+        recall += len(set(expected) & set(found)) / k
+        error = max(error, float(np.max(np.abs(expected_scores[expected] - found_scores[expected]))))
+    return agreement / len(queries), recall / len(queries), error
+
+def redis_memory(host, port, codec, entries, vectors):
+    import redis
+
+    client = redis.Redis(host=host, port=port)
+    legacy_key = "report:legacy"
+    try:
+        for (query, response), vector in zip(entries, vectors):
+            client.zadd(legacy_key, {json.dumps({"query": query, "query_vector": vector.tolist(), "response": json.dumps(response)}): 1})
+        legacy = client.memory_usage(legacy_key, samples=0) / len(entries)
+
+        compact = 0
+        for i, ((query, response), vector) in enumerate(zip(entries, vectors)):
+            vector_bytes, scale = codec.encode_vector(vector)
+            key = f"report:compact:{i}"
+            client.hset(key, mapping={"university_id": "U000", "query": query, "response": codec.encode_response(json.dumps(response)), "vector": vector_bytes, "scale": scale})
+            compact += client.memory_usage(key, samples=0)
+        return legacy, compact / len(entries)
+    finally:
+        client.delete(legacy_key, *[f"report:compact:{i}" for i in range(len(entries))])
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-entry cache size and lookup accuracy for each vector encoding.")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dimension", type=int, default=int(os.environ.get('VECTOR_DIMENSION', 768)))
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--compression-level", type=int, default=int(os.environ.get('RESPONSE_COMPRESSION_LEVEL', 3)))
+    parser.add_argument("--redis-host", help="Also measure MEMORY USAGE against this Redis instance")
+    parser.add_argument("--redis-port", type=int, default=6379)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    entries, vectors = synthetic_entries(args.entries, args.dimension, rng)
+    queries = vectors[rng.integers(0, args.entries, args.queries)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    legacy = np.mean([legacy_entry_size(query, response, vector) for (query, response), vector in zip(entries, vectors)])
+    print(f"Payload bytes per entry ({args.entries} synthetic entries, {args.dimension} dims)")
+    print("Without RediSearch every entry also keeps a row in the in-process similarity matrix.")
+    print(f"{'format':>16} {'bytes':>8} {'ratio':>7} {'+ matrix':>9} {'ratio':>7}")
+    print(f"{'legacy JSON':>16} {legacy:>8.0f} {1:>7.2f} {legacy:>9.0f} {1:>7.2f}")
+    for vector_type, dtype in VECTOR_DTYPES.items():
+        codec = EntryCodec(vector_type, args.compression_level)
+        compact = np.mean([compact_entry_size(codec, query, response, vector) for (query, response), vector in zip(entries, vectors)])
+        fallback = compact + SimilarityEngine(args.dimension, dtype).row_size
+        print(f"{vector_type + ' + zstd':>16} {compact:>8.0f} {legacy / compact:>7.2f} {fallback:>9.0f} {legacy / fallback:>7.2f}")
+
+    print()
+    print(f"Lookup accuracy against float32 ({args.queries} queries)")
+    print(f"{'path':>8} {'type':>8} {'top-1':>7} {'recall@' + str(args.k):>9} {'max |d sim|':>12}")
+    for vector_type, dtype in VECTOR_DTYPES.items():
+        codec = EntryCodec(vector_type, args.compression_level)
+        top1, recall, error = index_accuracy(codec, vectors, queries, args.k)
+        print(f"{'index':>8} {vector_type:>8} {top1:>7.3f} {recall:>9.3f} {error:>12.5f}")
+        top1, recall, error = matrix_accuracy(dtype, vectors, queries, args.k)
+        print(f"{'matrix':>8} {vector_type:>8} {top1:>7.3f} {recall:>9.3f} {error:>12.5f}")
+
+    if args.redis_host:
+        print()
+        print("Redis MEMORY USAGE per entry")
+        for vector_type in VECTOR_DTYPES:
+            codec = EntryCodec(vector_type, args.compression_level)
+            legacy_memory, compact_memory = redis_memory(args.redis_host, args.redis_port, codec, entries[:500], vectors[:500])
+            print(f"{vector_type:>8} legacy {legacy_memory:>8.0f} compact {compact_memory:>8.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from similarity import SimilarityEngine
+
+TOP_K = 3
+
+def loop_search(cached_items, encoded_query):
+    results = []
+    for item in cached_items:
+        item_data = json.loads(item)
+        similarity = np.dot(encoded_query, item_data['query_vector']) / (np.linalg.norm(encoded_query) * np.linalg.norm(item_data['query_vector']))
+        results.append((similarity, item_data))
+
+    results.sort(key=lambda x: x[0], reverse=True)
+    return results[:TOP_K]
+
+def matrix_search(engine, blob, encoded_query):
+    matrix = engine.load_matrix(blob)
+    return engine.top_k(matrix, encoded_query, TOP_K)
+
+def time_call(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+def run(size, dimension, repeats, rng):
+    vectors = rng.standard_normal((size, dimension)).astype(np.float32)
+    query = rng.standard_normal(dimension).astype(np.float32)
+
+    cached_items = [
+        json.dumps({"query": f"query {i}", "query_vector": vector.tolist(), "response": json.dumps("")})
+        for i, vector in enumerate(vectors)
+    ]
+    engine = SimilarityEngine(dimension)
+    blob = engine.to_row(vectors)
+
+    loop_top = [round(float(sim), 4) for sim, _ in loop_search(cached_items, query)]
+    _, matrix_scores = matrix_search(engine, blob, query)
+    assert np.allclose(loop_top, matrix_scores, atol=1e-3), (loop_top, matrix_scores)
+
+    loop_ms = time_call(lambda: loop_search(cached_items, query), repeats)
+    matrix_ms = time_call(lambda: matrix_search(engine, blob, query), repeats)
+    return loop_ms, matrix_ms
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the per-entry Python loop with the vectorized similarity engine.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dimension", type=int, default=int(os.environ.get('VECTOR_DIMENSION', 768)))
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'entries':>10} {'loop (ms)':>12} {'matrix (ms)':>12} {'speedup':>9}")
+    for size in args.sizes:
+        loop_ms, matrix_ms = run(size, args.dimension, args.repeats, rng)
+        print(f"{size:>10} {loop_ms:>12.2f} {matrix_ms:>12.2f} {loop_ms / matrix_ms:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
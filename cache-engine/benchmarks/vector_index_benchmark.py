@@ -0,0 +1,104 @@
+import argparse
+import os
+import time
+import numpy as np
+import redis
+from redis.commands.search.field import TagField, VectorField
+from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+from redis.commands.search.query import Query
+
+UNIVERSITY_ID = "BENCH"
+
+def synthetic_cache(size, dimension, rng):
+    centers = rng.standard_normal((max(size // 50, 1), dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, centers.shape[0], size)]
+    vectors += 0.3 * rng.standard_normal((size, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def vector_attributes(algorithm, dimension, args):
+    attributes = {"TYPE": "FLOAT32", "DIM": dimension, "DISTANCE_METRIC": "COSINE"}
+    if algorithm == "HNSW":
+        attributes.update({"M": args.m, "EF_CONSTRUCTION": args.ef_construction, "EF_RUNTIME": args.ef_runtime})
+    return attributes
+
+def build_index(client, algorithm, size, vectors, args):
+    index_name = f"idx:bench:{algorithm}:{size}"
+    prefix = f"bench:{algorithm}:{size}:"
+    schema = (
+        TagField("university_id"),
+        VectorField("vector", algorithm, vector_attributes(algorithm, vectors.shape[1], args)),
+    )
+    client.ft(index_name).create_index(
+        fields=schema, definition=IndexDefinition(prefix=[prefix], index_type=IndexType.HASH)
+    )
+
+    start = time.perf_counter()
+    for offset in range(0, size, 1000):
+        pipeline = client.pipeline(transaction=False)
+        for i in range(offset, min(offset + 1000, size)):
+            pipeline.hset(f"{prefix}{i}", mapping={"university_id": UNIVERSITY_ID, "vector": vectors[i].tobytes()})
+        pipeline.execute()
+    while int(client.ft(index_name).info()["indexing"]):
+        time.sleep(0.1)
+    return index_name, time.perf_counter() - start
+
+def run_queries(client, index_name, algorithm, queries, k, args):
+    knn_clause = f"KNN {k} @vector $vector"
+    if algorithm == "HNSW":
+        knn_clause += f" EF_RUNTIME {args.ef_runtime}"
+    query = (
+        Query(f"(@university_id:{{{UNIVERSITY_ID}}})=>[{knn_clause} AS distance]")
+        .sort_by("distance")
+        .return_fields("distance")
+        .paging(0, k)
+        .dialect(2)
+    )
+
+    latencies, results = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        docs = client.ft(index_name).search(query, query_params={"vector": vector.tobytes()}).docs
+        latencies.append(time.perf_counter() - start)
+        results.append([int(doc.id.rsplit(":", 1)[1]) for doc in docs])
+    return np.array(latencies) * 1000, results
+
+def recall(results, ground_truth):
+    hits = sum(len(set(found) & set(expected)) for found, expected in zip(results, ground_truth))
+    return hits / sum(len(expected) for expected in ground_truth)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FLAT and HNSW vector indexes on synthetic per-university caches.")
+    parser.add_argument("--host", default=os.environ.get('HOST', 'localhost'))
+    parser.add_argument("--port", type=int, default=int(os.environ.get('PORT', 6379)))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000, 100_000])
+    parser.add_argument("--dimension", type=int, default=int(os.environ.get('VECTOR_DIMENSION', 768)))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--m", type=int, default=int(os.environ.get('HNSW_M', 16)))
+    parser.add_argument("--ef-construction", type=int, default=int(os.environ.get('HNSW_EF_CONSTRUCTION', 200)))
+    parser.add_argument("--ef-runtime", type=int, default=int(os.environ.get('HNSW_EF_RUNTIME', 10)))
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port)
+    rng = np.random.default_rng(0)
+
+    print(f"{'entries':>8} {'index':>6} {'build (s)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'recall@' + str(args.k):>9}")
+    for size in args.sizes:
+        vectors = synthetic_cache(size, args.dimension, rng)
+        queries = vectors[rng.integers(0, size, args.queries)]
+        queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+        ground_truth = [np.argsort(vectors @ query)[::-1][:args.k].tolist() for query in queries]
+
+        for algorithm in ("FLAT", "HNSW"):
+            index_name, build_seconds = build_index(client, algorithm, size, vectors, args)
+            try:
+                latencies, results = run_queries(client, index_name, algorithm, queries, args.k, args)
+            finally:
+                client.ft(index_name).dropindex(delete_documents=True)
+            print(
+                f"{size:>8} {algorithm:>6} {build_seconds:>10.2f} {np.percentile(latencies, 50):>9.2f} "
+                f"{np.percentile(latencies, 99):>9.2f} {recall(results, ground_truth):>9.3f}"
+            )
+
+if __name__ == "__main__":
+    main()
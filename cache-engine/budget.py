@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+from keys import HITS_KEY, LOOKUPS_KEY, USAGE_KEY, entry_key, parse_usage_field, rank_key
+from metrics import CACHE_EVICTIONS, STAGE_LATENCY
+
+class BudgetManager:
+    def __init__(self, cluster, eviction_policy, generations, row_size, budget_bytes, reservations, default_reservation, interval, batch_size, stats_window):
+        self.cluster = cluster
+        self.eviction_policy = eviction_policy
+        self.generations = generations
+        self.row_size = row_size
+        self.budget_bytes = budget_bytes
+        self.reservations = reservations
+        self.default_reservation = default_reservation
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stats_window = stats_window
+        self.wake = asyncio.Event()
+        self.worker = None
+
+    def start(self):
+        if self.budget_bytes > 0:
+            self.worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+
+    def notify(self):
+        self.wake.set()
+
+    def reservation(self, university_id):
+        return self.reservations.get(university_id, self.default_reservation)
+
+    def record_lookups(self, outcomes, client):
+        for university_id, hit in outcomes:
+            client.hincrby(LOOKUPS_KEY, university_id, 1)
+            if hit:
+                client.hincrby(HITS_KEY, university_id, 1)
+
+    async def usage(self):
+        usage = {}
+        for node in self.cluster.healthy_nodes():
+            node_usage = {
+                parse_usage_field(field): int(used)
+                for field, used in (await node.redis_client.hgetall(USAGE_KEY)).items()
+            }
+            current = await self.generations.node_generations(node, [university_id for university_id, _ in node_usage])
+            for (university_id, scope_generation), used in node_usage.items():
+                if scope_generation == current[university_id] and self.cluster.node_for(university_id) is node:
+                    usage[university_id] = (scope_generation, used)
+        return usage
+
+    async def hit_rates(self, university_ids):
+        async def build(pipeline, university_id, _):
+            pipeline.hget(HITS_KEY, university_id)
+            pipeline.hget(LOOKUPS_KEY, university_id)
+
+        stats = await self.cluster.pipeline([(university_id, None) for university_id in university_ids], build)
+        return {
+            university_id: (int(hit_count or 0) + 1) / (int(lookup_count or 0) + 2)
+            for university_id, (hit_count, lookup_count) in zip(university_ids, stats)
+        }
+
+    async def decay_stats(self):
+        for node in self.cluster.healthy_nodes():
+            lookups = await node.redis_client.hgetall(LOOKUPS_KEY)
+            stale = [university_id for university_id, count in lookups.items() if int(count) > self.stats_window]
+            if not stale:
+                continue
+            hits = await node.redis_client.hmget(HITS_KEY, stale)
+            pipeline = node.redis_client.pipeline(transaction=False)
+            for university_id, hit_count in zip(stale, hits):
+                pipeline.hset(LOOKUPS_KEY, university_id, int(lookups[university_id]) // 2)
+                pipeline.hset(HITS_KEY, university_id, int(hit_count or 0) // 2)
+            await pipeline.execute()
+
+    async def candidates(self, scopes):
+        async def build(pipeline, university_id, scope_generation):
+            pipeline.zrange(rank_key(university_id, scope_generation), 0, self.batch_size - 1)
+
+        items = [(university_id, scope_generation) for university_id, (scope_generation, _) in scopes.items()]
+        entry_ids = {university_id: ids for (university_id, _), (ids,) in zip(items, await self.cluster.pipeline(items, build))}
+
+        async def build_sizes(pipeline, university_id, ids):
+            for entry_id in ids:
+                pipeline.hget(entry_key(university_id, entry_id), "size")
+
+        items = list(entry_ids.items())
+        sizes = await self.cluster.pipeline(items, build_sizes)
+        return {
+            university_id: [(entry_id, int(float(size or 0))) for entry_id, size in zip(ids, entry_sizes)]
+            for (university_id, ids), entry_sizes in zip(items, sizes)
+        }
+
+    def plan(self, scopes, candidates, hit_rates, excess):
+        heap = []
+        for university_id, entries in candidates.items():
+            if entries:
+                entry_id, size = entries[0]
+                heapq.heappush(heap, (hit_rates[university_id] / max(size, 1), university_id, 0))
+
+        used = {university_id: scope_used for university_id, (_, scope_used) in scopes.items()}
+        victims = {}
+        while heap and excess > 0:
+            _, university_id, position = heapq.heappop(heap)
+            entry_id, size = candidates[university_id][position]
+            if used[university_id] - size < self.reservation(university_id):
+                continue
+            victims.setdefault(university_id, []).append(entry_id)
+            used[university_id] -= size
+            excess -= size
+            position += 1
+            if position < len(candidates[university_id]):
+                _, next_size = candidates[university_id][position]
+                heapq.heappush(heap, (hit_rates[university_id] / max(next_size, 1), university_id, position))
+        return victims
+
+    async def enforce(self):
+        evicted = 0
+        while True:
+            scopes = await self.usage()
+            excess = sum(used for _, used in scopes.values()) - self.budget_bytes
+            if excess <= 0:
+                return evicted
+
+            scopes = {
+                university_id: scope
+                for university_id, scope in scopes.items()
+                if scope[1] > self.reservation(university_id)
+            }
+            if not scopes:
+                return evicted
+
+            candidates = await self.candidates(scopes)
+            hit_rates = await self.hit_rates(list(scopes))
+            victims = self.plan(scopes, candidates, hit_rates, excess)
+            if not victims:
+                return evicted
+
+            async def build(pipeline, university_id, entry_ids):
+                await self.eviction_policy.evict(university_id, scopes[university_id][0], entry_ids, self.row_size, client=pipeline)
+
+            with STAGE_LATENCY.labels(stage="eviction").time():
+                round_evicted = sum(sum(replies) for replies in await self.cluster.pipeline(list(victims.items()), build))
+            if not round_evicted:
+                return evicted
+            CACHE_EVICTIONS.labels(policy=self.eviction_policy.name, reason="budget").inc(round_evicted)
+            evicted += round_evicted
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                evicted = await self.enforce()
+                if evicted:
+                    print(f"Evicted {evicted} cache entries to stay within the {self.budget_bytes} byte budget.")
+                await self.decay_stats()
+            except Exception as e:
+                print(f"Error in cache budget enforcement: {str(e)}")
@@ -0,0 +1,39 @@
+import numpy as np
+import zstandard
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+VECTOR_DTYPES = {
+    "FLOAT32": np.float32,
+    "FLOAT16": np.float16,
+    "INT8": np.int8,
+}
+
+class EntryCodec:
+    def __init__(self, vector_type, compression_level):
+        self.vector_type = vector_type.upper()
+        self.dtype = np.dtype(VECTOR_DTYPES[self.vector_type])
+        self.compressor = zstandard.ZstdCompressor(level=compression_level)
+        self.decompressor = zstandard.ZstdDecompressor()
+
+    def quantize(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.vector_type != "INT8":
+            return vector.astype(self.dtype), 1.0
+        scale = float(np.max(np.abs(vector))) / 127 or 1.0
+        return np.clip(np.rint(vector / scale), -127, 127).astype(np.int8), scale
+
+    def encode_vector(self, vector):
+        quantized, scale = self.quantize(vector)
+        return quantized.tobytes(), scale
+
+    def decode_vector(self, blob, scale=1.0):
+        return np.frombuffer(blob, dtype=self.dtype).astype(np.float32) * float(scale)
+
+    def encode_response(self, response):
+        return self.compressor.compress(response.encode())
+
+    def decode_response(self, blob):
+        if blob.startswith(ZSTD_MAGIC):
+            blob = self.decompressor.decompress(blob)
+        return blob.decode()
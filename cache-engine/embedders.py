@@ -0,0 +1,99 @@
+import json
+import os
+import numpy as np
+
+ONNX_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+EMBEDDER_CONFIG_FILE = "embedder.json"
+TOKENIZER_FILE = "tokenizer.json"
+POOLING_MODES = (
+    "pooling_mode_cls_token",
+    "pooling_mode_max_tokens",
+    "pooling_mode_mean_tokens",
+    "pooling_mode_mean_sqrt_len_tokens",
+)
+
+class TorchEmbedder:
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts):
+        return np.asarray(self.model.encode(texts), dtype=np.float32)
+
+class OnnxEmbedder:
+    def __init__(self, model_dir, quantized, threads):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, EMBEDDER_CONFIG_FILE)) as f:
+            self.config = json.load(f)
+        pooling = self.config["pooling"]
+        unsupported = sorted(mode for mode, enabled in pooling.items() if mode.startswith("pooling_mode_") and enabled and mode not in POOLING_MODES)
+        if unsupported or not any(pooling.get(mode) for mode in POOLING_MODES):
+            raise ValueError(f"Unsupported pooling for the ONNX embedder: {', '.join(unsupported) or 'no pooling mode enabled'}")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+    def pool(self, token_embeddings, attention_mask):
+        pooling = self.config["pooling"]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = []
+        if pooling.get("pooling_mode_cls_token"):
+            pooled.append(token_embeddings[:, 0])
+        if pooling.get("pooling_mode_max_tokens"):
+            pooled.append(np.where(mask > 0, token_embeddings, -1e9).max(axis=1))
+        if pooling.get("pooling_mode_mean_tokens") or pooling.get("pooling_mode_mean_sqrt_len_tokens"):
+            summed = (token_embeddings * mask).sum(axis=1)
+            counts = np.maximum(mask.sum(axis=1), 1e-9)
+            if pooling.get("pooling_mode_mean_tokens"):
+                pooled.append(summed / counts)
+            if pooling.get("pooling_mode_mean_sqrt_len_tokens"):
+                pooled.append(summed / np.sqrt(counts))
+        return np.concatenate(pooled, axis=1)
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+
+        encodings = self.tokenizer.encode_batch(texts)
+        features = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {name: features[name] for name in self.input_names})[0]
+        embeddings = self.pool(token_embeddings, features["attention_mask"])
+        if self.config["normalize"]:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings.astype(np.float32)
+
+def onnx_model_exists(model_dir, quantized):
+    model_file = QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+    return all(
+        os.path.exists(os.path.join(model_dir, file_name))
+        for file_name in (model_file, EMBEDDER_CONFIG_FILE, TOKENIZER_FILE)
+    )
+
+def load_embedder(backend, model_name, model_dir, quantized, threads):
+    if backend == "TORCH":
+        return TorchEmbedder(model_name)
+    if backend == "ONNX":
+        if not onnx_model_exists(model_dir, quantized):
+            from export_onnx import export_model
+            print(f"No exported ONNX model in {model_dir}, exporting {model_name}.")
+            export_model(model_name, model_dir, quantize=quantized)
+        return OnnxEmbedder(model_dir, quantized, threads)
+    raise ValueError(f"Unknown embedding backend: {backend}")
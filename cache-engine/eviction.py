@@ -0,0 +1,206 @@
+from keys import (
+    USAGE_KEY,
+    clock_key,
+    entry_prefix,
+    exact_key,
+    free_key,
+    freq_key,
+    ids_key,
+    matrix_key,
+    rank_key,
+    recency_key,
+    usage_field,
+)
+
+EVICT_FUNCTION = """
+local function evict(victim_id, victim_priority)
+    local victim_key = prefix .. victim_id
+    local meta = redis.call('HMGET', victim_key, 'row', 'fingerprint', 'size')
+    if meta[2] and redis.call('HGET', exact, meta[2]) == victim_id then
+        redis.call('HDEL', exact, meta[2])
+    end
+    redis.call('HINCRBY', usage, scope, -tonumber(meta[3] or '0'))
+    redis.call('DEL', victim_key)
+    redis.call('ZREM', rank, victim_id)
+    redis.call('ZREM', freq, victim_id)
+    redis.call('ZREM', recency, victim_id)
+    {on_evict}
+    return tonumber(meta[1])
+end
+"""
+
+SCRIPT_HEADER = """
+local rank, freq, recency, clock, matrix = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local ids, exact, free, usage = KEYS[6], KEYS[7], KEYS[8], KEYS[9]
+local prefix, scope, row_size = ARGV[1], ARGV[2], tonumber(ARGV[3])
+local clock_value = tonumber(redis.call('GET', clock) or '0')
+"""
+
+INSERT_SCRIPT = SCRIPT_HEADER + EVICT_FUNCTION + """
+local entry_id, max_size, now = ARGV[4], tonumber(ARGV[5]), tonumber(ARGV[6])
+local matrix_row, cost, size, fingerprint = ARGV[7], tonumber(ARGV[8]), tonumber(ARGV[9]), ARGV[10]
+
+local row = nil
+local victim_id = false
+if redis.call('ZCARD', rank) >= max_size then
+    local victim = redis.call('ZRANGE', rank, 0, 0, 'WITHSCORES')
+    victim_id = victim[1]
+    row = evict(victim_id, tonumber(victim[2]))
+elseif row_size > 0 then
+    row = tonumber(redis.call('LPOP', free))
+end
+
+local fields = {{'cost', cost, 'size', size, 'fingerprint', fingerprint}}
+if row_size > 0 then
+    if row then
+        redis.call('SETRANGE', matrix, row * row_size, matrix_row)
+        redis.call('LSET', ids, row, entry_id)
+    else
+        row = redis.call('RPUSH', ids, entry_id) - 1
+        redis.call('APPEND', matrix, matrix_row)
+    end
+    fields[#fields + 1] = 'row'
+    fields[#fields + 1] = row
+end
+for i = 11, #ARGV do
+    fields[#fields + 1] = ARGV[i]
+end
+redis.call('HSET', prefix .. entry_id, unpack(fields))
+redis.call('ZADD', freq, 1, entry_id)
+redis.call('ZADD', recency, now, entry_id)
+redis.call('ZADD', rank, {insert_priority}, entry_id)
+redis.call('HSET', exact, fingerprint, entry_id)
+redis.call('HINCRBY', usage, scope, size)
+return victim_id
+"""
+
+EVICT_SCRIPT = SCRIPT_HEADER + EVICT_FUNCTION + """
+local evicted = 0
+for i = 4, #ARGV do
+    local victim_id = ARGV[i]
+    local victim_priority = redis.call('ZSCORE', rank, victim_id)
+    if victim_priority then
+        local row = evict(victim_id, tonumber(victim_priority))
+        if row then
+            redis.call('SETRANGE', matrix, row * row_size, string.rep('\\0', row_size))
+            redis.call('LSET', ids, row, '')
+            redis.call('RPUSH', free, row)
+        end
+        evicted = evicted + 1
+    end
+end
+return evicted
+"""
+
+TOUCH_SCRIPT = """
+local rank, freq, recency, clock = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local prefix, now = ARGV[1], tonumber(ARGV[2])
+local clock_value = tonumber(redis.call('GET', clock) or '0')
+
+for i = 3, #ARGV do
+    local entry_id = ARGV[i]
+    if redis.call('ZSCORE', rank, entry_id) then
+        local hits = tonumber(redis.call('ZINCRBY', freq, 1, entry_id))
+        redis.call('ZADD', recency, now, entry_id)
+        {on_touch}
+    end
+end
+return true
+"""
+
+class EvictionPolicy:
+    name = None
+    insert_priority = None
+    on_touch = ""
+    on_evict = ""
+
+    def __init__(self, redis_client):
+        self.insert_script = redis_client.register_script(
+            INSERT_SCRIPT.format(insert_priority=self.insert_priority, on_evict=self.on_evict)
+        )
+        self.evict_script = redis_client.register_script(
+            EVICT_SCRIPT.format(on_evict=self.on_evict)
+        )
+        self.touch_script = redis_client.register_script(
+            TOUCH_SCRIPT.format(on_touch=self.on_touch)
+        )
+
+    def scope_keys(self, university_id, generation):
+        return [
+            rank_key(university_id, generation),
+            freq_key(university_id, generation),
+            recency_key(university_id, generation),
+            clock_key(university_id, generation),
+            matrix_key(university_id, generation),
+            ids_key(university_id, generation),
+            exact_key(university_id, generation),
+            free_key(university_id, generation),
+            USAGE_KEY,
+        ]
+
+    def scope_args(self, university_id, generation, row_size):
+        return [entry_prefix(university_id), usage_field(university_id, generation), row_size]
+
+    async def insert(self, university_id, generation, entry_id, fingerprint, fields, matrix_row, row_size, max_size, now, cost, size, client=None):
+        args = self.scope_args(university_id, generation, row_size)
+        args.extend([entry_id, max_size, now, matrix_row, cost, size, fingerprint])
+        for field, value in fields.items():
+            args.extend([field, value])
+        return await self.insert_script(
+            keys=self.scope_keys(university_id, generation),
+            args=args,
+            client=client,
+        )
+
+    async def evict(self, university_id, generation, entry_ids, row_size, client=None):
+        if not entry_ids:
+            return 0
+        return await self.evict_script(
+            keys=self.scope_keys(university_id, generation),
+            args=[*self.scope_args(university_id, generation, row_size), *entry_ids],
+            client=client,
+        )
+
+    async def touch(self, university_id, generation, entry_ids, now, client=None):
+        if not entry_ids:
+            return
+        await self.touch_script(
+            keys=[
+                rank_key(university_id, generation),
+                freq_key(university_id, generation),
+                recency_key(university_id, generation),
+                clock_key(university_id, generation),
+            ],
+            args=[entry_prefix(university_id), now, *entry_ids],
+            client=client,
+        )
+
+class LFUPolicy(EvictionPolicy):
+    name = "LFU"
+    insert_priority = "1"
+    on_touch = "redis.call('ZADD', rank, hits, entry_id)"
+
+class LRUPolicy(EvictionPolicy):
+    name = "LRU"
+    insert_priority = "now"
+    on_touch = "redis.call('ZADD', rank, now, entry_id)"
+
+class FIFOPolicy(EvictionPolicy):
+    name = "FIFO"
+    insert_priority = "now"
+
+class GDSFPolicy(EvictionPolicy):
+    name = "GDSF"
+    insert_priority = "clock_value + cost / size"
+    on_touch = """local meta = redis.call('HMGET', prefix .. entry_id, 'cost', 'size')
+        redis.call('ZADD', rank, clock_value + hits * tonumber(meta[1]) / tonumber(meta[2]), entry_id)"""
+    on_evict = """clock_value = victim_priority
+    redis.call('SET', clock, victim_priority)"""
+
+EVICTION_POLICIES = {
+    "LFU": LFUPolicy,
+    "LRU": LRUPolicy,
+    "FIFO": FIFOPolicy,
+    "ROUND_ROBIN": FIFOPolicy,
+    "GDSF": GDSFPolicy,
+}
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+from embedders import EMBEDDER_CONFIG_FILE, ONNX_MODEL_FILE, QUANTIZED_MODEL_FILE, TOKENIZER_FILE
+
+FORWARD_INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+
+def export_model(model_name, output_dir, quantize=True, opset=14):
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling = next(module for module in model if isinstance(module, Pooling))
+    tokenizer = transformer.tokenizer
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)))[0]
+
+    input_names = [name for name in FORWARD_INPUTS if name in tokenizer.model_input_names]
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer.auto_model).eval(),
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    print(f"Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized_path = os.path.join(output_dir, QUANTIZED_MODEL_FILE)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"Quantized weights to int8 in {quantized_path}")
+
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+    with open(os.path.join(output_dir, EMBEDDER_CONFIG_FILE), "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "max_seq_length": model.max_seq_length,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+            "pooling": pooling.get_config_dict(),
+            "normalize": any(isinstance(module, Normalize) for module in model),
+        }, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the configured SentenceTransformer to ONNX, optionally with int8 dynamic quantization.")
+    parser.add_argument("--model", default=os.environ.get('EMBEDER', 'msmarco-distilbert-base-v4'))
+    parser.add_argument("--output-dir", default=os.environ.get('ONNX_MODEL_DIR', 'onnx'))
+    parser.add_argument("--no-quantize", action="store_true")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+    export_model(args.model, args.output_dir, quantize=not args.no_quantize, opset=args.opset)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import hashlib
+import re
+import unicodedata
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+def normalize_query(text):
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(PUNCTUATION.sub("", text).split())
+
+def query_fingerprint(text):
+    return hashlib.blake2b(normalize_query(text).encode(), digest_size=16).hexdigest()
@@ -0,0 +1,121 @@
+import asyncio
+from keys import (
+    SCHEMA_GENERATION_KEY,
+    USAGE_KEY,
+    data_generation_key,
+    entry_key,
+    generation,
+    parse_usage_field,
+    rank_key,
+    university_keys,
+    usage_field,
+)
+
+class GenerationManager:
+    def __init__(self, cluster, gc_interval, gc_batch_size):
+        self.cluster = cluster
+        self.gc_interval = gc_interval
+        self.gc_batch_size = gc_batch_size
+        self.worker = None
+
+    def start(self):
+        self.worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+
+    async def node_generations(self, node, university_ids):
+        university_ids = list(dict.fromkeys(university_ids))
+        pipeline = node.redis_client.pipeline(transaction=False)
+        pipeline.get(SCHEMA_GENERATION_KEY)
+        for university_id in university_ids:
+            pipeline.get(data_generation_key(university_id))
+        schema_generation, *data_generations = await pipeline.execute()
+        return {
+            university_id: generation(schema_generation, data_generation)
+            for university_id, data_generation in zip(university_ids, data_generations)
+        }
+
+    async def current_generations(self, university_ids):
+        groups = self.cluster.group(university_ids)
+        current = {}
+        for node_generations in await asyncio.gather(*(
+            self.node_generations(node, node_university_ids) for node, node_university_ids in groups.items() if node.healthy
+        )):
+            current.update(node_generations)
+        return current
+
+    async def invalidate_node_universities(self, node, university_ids):
+        current = await self.node_generations(node, university_ids)
+        pipeline = node.redis_client.pipeline(transaction=False)
+        for university_id, current_generation in current.items():
+            pipeline.zcard(rank_key(university_id, current_generation))
+            pipeline.incr(data_generation_key(university_id))
+        results = await pipeline.execute()
+        return dict(zip(current, results[::2]))
+
+    async def invalidate_universities(self, university_ids):
+        invalidated = {}
+        for node, node_university_ids in self.cluster.group(university_ids).items():
+            if node.healthy:
+                invalidated.update(await self.invalidate_node_universities(node, node_university_ids))
+        return invalidated
+
+    async def invalidate_node(self, node):
+        return await node.redis_client.incr(SCHEMA_GENERATION_KEY)
+
+    async def invalidate_all(self):
+        for node in self.cluster.healthy_nodes():
+            await self.invalidate_node(node)
+
+    async def scopes(self, node):
+        scopes = [parse_usage_field(field) for field in await node.redis_client.hkeys(USAGE_KEY)]
+        current = await self.node_generations(node, [university_id for university_id, _ in scopes])
+        return [
+            (university_id, scope_generation, scope_generation == current[university_id])
+            for university_id, scope_generation in scopes
+        ]
+
+    async def current_scopes(self, node):
+        return [(university_id, scope_generation) for university_id, scope_generation, is_current in await self.scopes(node) if is_current]
+
+    async def collect_scope(self, node, university_id, scope_generation):
+        ranking_key = rank_key(university_id, scope_generation)
+        removed = 0
+        while True:
+            entry_ids = await node.redis_client.zrange(ranking_key, 0, self.gc_batch_size - 1)
+            if not entry_ids:
+                pipeline = node.redis_client.pipeline(transaction=False)
+                pipeline.unlink(*university_keys(university_id, scope_generation))
+                pipeline.hdel(USAGE_KEY, usage_field(university_id, scope_generation))
+                await pipeline.execute()
+                return removed
+
+            pipeline = node.redis_client.pipeline(transaction=False)
+            pipeline.unlink(*[entry_key(university_id, entry_id) for entry_id in entry_ids])
+            pipeline.zrem(ranking_key, *entry_ids)
+            await pipeline.execute()
+            removed += len(entry_ids)
+
+    async def collect_garbage(self):
+        removed = 0
+        for node in self.cluster.healthy_nodes():
+            for university_id, scope_generation, is_current in await self.scopes(node):
+                if not is_current:
+                    removed += await self.collect_scope(node, university_id, scope_generation)
+        return removed
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.gc_interval)
+            try:
+                removed = await self.collect_garbage()
+                if removed:
+                    print(f"Garbage collected {removed} stale cache entries.")
+            except Exception as e:
+                print(f"Error in cache garbage collection: {str(e)}")
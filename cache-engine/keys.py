@@ -0,0 +1,58 @@
+SCHEMA_GENERATION_KEY = "cache_schema_generation"
+USAGE_KEY = "cache_usage"
+HITS_KEY = "cache_hits"
+LOOKUPS_KEY = "cache_lookups"
+
+def entry_prefix(university_id):
+    return f"cache:{university_id}:"
+
+def entry_key(university_id, entry_id):
+    return f"{entry_prefix(university_id)}{entry_id}"
+
+def data_generation_key(university_id):
+    return f"cache_generation:{university_id}"
+
+def generation(schema_generation, data_generation):
+    return f"{int(schema_generation or 0)}.{int(data_generation or 0)}"
+
+def rank_key(university_id, generation):
+    return f"cache_rank:{university_id}:{generation}"
+
+def freq_key(university_id, generation):
+    return f"cache_freq:{university_id}:{generation}"
+
+def recency_key(university_id, generation):
+    return f"cache_recency:{university_id}:{generation}"
+
+def clock_key(university_id, generation):
+    return f"cache_clock:{university_id}:{generation}"
+
+def matrix_key(university_id, generation):
+    return f"cache_matrix:{university_id}:{generation}"
+
+def ids_key(university_id, generation):
+    return f"cache_ids:{university_id}:{generation}"
+
+def exact_key(university_id, generation):
+    return f"cache_exact:{university_id}:{generation}"
+
+def free_key(university_id, generation):
+    return f"cache_free:{university_id}:{generation}"
+
+def usage_field(university_id, generation):
+    return f"{university_id}:{generation}"
+
+def parse_usage_field(field):
+    return tuple(field.rsplit(":", 1))
+
+def university_keys(university_id, generation):
+    return [
+        rank_key(university_id, generation),
+        freq_key(university_id, generation),
+        recency_key(university_id, generation),
+        clock_key(university_id, generation),
+        matrix_key(university_id, generation),
+        ids_key(university_id, generation),
+        exact_key(university_id, generation),
+        free_key(university_id, generation),
+    ]
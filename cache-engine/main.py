@@ -1,6 +1,8 @@
-from fastapi import FastAPI
+import os
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from utils import redis_manager
-from routes import router as cache_router
+from routes import router as cache_router, rebalance, refresh_usage_metrics, warm_start
 
 app = FastAPI()
 
@@ -9,11 +11,22 @@ app.include_router(cache_router)
 @app.on_event("startup")
 async def startup_event():
     await redis_manager.initialize()
+    await rebalance()
+    if os.environ['RESTORE_SNAPSHOT']:
+        await warm_start(os.environ['RESTORE_SNAPSHOT'])
 
 @app.get("/health") 
 async def ping():
     return {"server": "healthy and listening requests"}
 
+@app.get("/metrics")
+async def metrics():
+    try:
+        await refresh_usage_metrics()
+    except Exception as e:
+        print(f"Error refreshing cache usage metrics: {str(e)}")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.on_event("shutdown")
 async def shutdown_event():
     await redis_manager.close()
\ No newline at end of file
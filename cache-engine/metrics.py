@@ -0,0 +1,44 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "cache_engine_embedding_batch_size",
+    "Number of queries encoded per embedder call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EMBEDDING_QUEUE_WAIT = Histogram(
+    "cache_engine_embedding_queue_wait_seconds",
+    "Time an encode request waits in the batching queue before dispatch",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_engine_lookups_total",
+    "Cache lookups by the tier that answered them (exact, semantic or miss)",
+    ["tier"],
+)
+TOP_SIMILARITY = Histogram(
+    "cache_engine_top_similarity",
+    "Similarity of the best cached candidate per lookup, by outcome (hit, near_miss or miss)",
+    ["outcome"],
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.55, 0.6, 0.65, 0.7, 0.8, 0.9, 0.95, 1.0),
+)
+STAGE_LATENCY = Histogram(
+    "cache_engine_stage_latency_seconds",
+    "Latency of cache-engine stages: encode, redis_fetch, scoring (in-process top-k or RediSearch KNN), insert and eviction",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+CACHE_EVICTIONS = Counter(
+    "cache_engine_evictions_total",
+    "Cache entries evicted, by eviction policy and reason (capacity or budget)",
+    ["policy", "reason"],
+)
+CACHE_ENTRIES = Gauge(
+    "cache_engine_entries",
+    "Cached entries in the current generation, per university",
+    ["university_id"],
+)
+CACHE_BYTES = Gauge(
+    "cache_engine_bytes",
+    "Approximate bytes held by the current generation, per university",
+    ["university_id"],
+)
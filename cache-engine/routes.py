@@ -1,10 +1,17 @@
+import base64
 import json
 import time
-import numpy as np
+import uuid
 import os
+import numpy as np
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from redis.commands.search.query import Query
+from codec import EntryCodec
+from fingerprint import query_fingerprint
+from keys import entry_key, exact_key, ids_key, matrix_key, rank_key
+from metrics import CACHE_BYTES, CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_LOOKUPS, STAGE_LATENCY, TOP_SIMILARITY
+from snapshot import SnapshotReader, SnapshotWriter, snapshot_path
 from utils import redis_manager
 
 router = APIRouter()
@@ -18,76 +25,285 @@ class CacheRequest(BaseModel):
     query: str
     response: str
     version: str
+    query_vector: Optional[str] = None
+    cost: float = 1.0
+
+class BulkQueryRequest(BaseModel):
+    queries: List[QueryRequest]
+
+class BulkCacheRequest(BaseModel):
+    entries: List[CacheRequest]
+
+class SnapshotRequest(BaseModel):
+    name: str
+    university_id: Optional[str] = None
 
 class FlushUniversityCacheRequest(BaseModel):
     university_id: str
 
 MAX_CACHE_SIZE_PER_UNIVERSITY = int(os.environ['MAX_CACHE_PER'])
-CACHE_EVICTION_ALGORITHM = os.environ['CACHE_ALGO']
+TOP_K = 3
+SEMANTIC_HIT_THRESHOLD = float(os.environ['SEMANTIC_HIT_THRESHOLD'])
+NEAR_MISS_MARGIN = float(os.environ['NEAR_MISS_MARGIN'])
+SNAPSHOT_DIR = os.environ['SNAPSHOT_DIR']
+SNAPSHOT_CHUNK_SIZE = 500
+
+TAG_SPECIAL_CHARACTERS = set(",.<>{}[]\"':;!@#$%^&*()-+=~|/\\ ")
+
+def escape_tag(value):
+    return "".join(f"\\{char}" if char in TAG_SPECIAL_CHARACTERS else char for char in value)
+
+def encode_vector(vector):
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+
+def decode_vector(encoded):
+    vector = np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+    if vector.shape[0] != redis_manager.vector_dimension:
+        raise ValueError(f"Expected a {redis_manager.vector_dimension}-dimensional query vector, got {vector.shape[0]}")
+    return vector
+
+async def get_cluster():
+    return redis_manager.cluster
 
-async def get_redis_client():
-    return redis_manager.redis_client
+async def insert_entry(request, generation, encoded_query, client):
+    vector, scale = redis_manager.codec.encode_vector(encoded_query)
+    if redis_manager.search_available:
+        matrix_row, row_size = b"", 0
+    else:
+        matrix_row, row_size = redis_manager.similarity_engine.to_row(encoded_query), redis_manager.similarity_engine.row_size
+    data = {
+        "university_id": request.university_id,
+        "generation": generation,
+        "query": request.query,
+        "response": redis_manager.codec.encode_response(json.dumps(request.response)),
+        "vector": vector,
+    }
+    if redis_manager.codec.vector_type == "INT8":
+        data["scale"] = scale
+    return await redis_manager.eviction_policy.insert(
+        request.university_id,
+        generation,
+        uuid.uuid4().hex,
+        query_fingerprint(request.query),
+        data,
+        matrix_row,
+        row_size,
+        MAX_CACHE_SIZE_PER_UNIVERSITY,
+        time.time(),
+        request.cost,
+        len(request.query.encode()) + len(data["response"]) + len(vector) + row_size,
+        client=client,
+    )
+
+async def insert_entries(cluster, entries):
+    entries = [(request, encoded_query) for request, encoded_query in entries if cluster.is_available(request.university_id)]
+    generations = await redis_manager.generations.current_generations([request.university_id for request, _ in entries])
+
+    async def build(pipeline, university_id, entry):
+        request, encoded_query = entry
+        await insert_entry(request, generations[university_id], encoded_query, client=pipeline)
+
+    with STAGE_LATENCY.labels(stage="eviction").time():
+        replies = await cluster.pipeline([(request.university_id, (request, encoded_query)) for request, encoded_query in entries], build)
+    evicted = sum(1 for victims in replies for victim in victims if victim)
+    if evicted:
+        CACHE_EVICTIONS.labels(policy=redis_manager.eviction_policy.name, reason="capacity").inc(evicted)
+    redis_manager.budget.notify()
+    return len(entries)
 
 @router.post("/cache_response")
-async def cache_response(request: CacheRequest, redis_client = Depends(get_redis_client)):
+async def cache_response(request: CacheRequest, cluster=Depends(get_cluster)):
     try:
-        pipeline = redis_client.pipeline()
-
-        encoded_query = redis_manager.embedder.encode(request.query).astype(np.float32).tolist()
-        cache_key = f"cache:{request.university_id}"
-
-        cache_size = redis_client.zcard(cache_key)
-        if cache_size >= MAX_CACHE_SIZE_PER_UNIVERSITY:
-            if CACHE_EVICTION_ALGORITHM == "LFU":
-                least_used = redis_client.zrange(cache_key, 0, 0)[0]
-                pipeline.zrem(cache_key, least_used)
-            else: 
-                oldest = redis_client.zrange(cache_key, 0, 0, withscores=True)[0]
-                pipeline.zremrangebyscore(cache_key, oldest[1], oldest[1])
-
-        data = {
-            "query": request.query,
-            "query_vector": encoded_query,
-            "response": json.dumps(request.response),
-        }
-        score = time.time() if CACHE_EVICTION_ALGORITHM == "ROUND_ROBIN" else 1
-        pipeline.zadd(cache_key, {json.dumps(data): score})
+        if not cluster.is_available(request.university_id):
+            print(f"Redis node for university_id {request.university_id} is unavailable, skipping cache insert.")
+            return False
 
-        if CACHE_EVICTION_ALGORITHM == "LFU":
-            pipeline.zincrby(cache_key, 1, json.dumps(data))
+        if request.query_vector:
+            encoded_query = decode_vector(request.query_vector)
+        else:
+            encoded_query = await redis_manager.encode(request.query)
 
-        pipeline.execute()
+        await insert_entries(cluster, [(request, encoded_query)])
         
         return True
     except Exception as e:
         print(f"Error in cache_response: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error caching response: {str(e)}")
-    
-@router.post("/get_cached_response")
-async def get_cached_response(query: QueryRequest, redis_client=Depends(get_redis_client)):
+
+@router.post("/cache_responses")
+async def cache_responses(request: BulkCacheRequest, cluster=Depends(get_cluster)):
     try:
-        encoded_query = redis_manager.embedder.encode(query.input_str)
-        cache_key = f"cache:{query.university_id}"
+        to_encode = [entry.query for entry in request.entries if not entry.query_vector]
+        encoded = iter(await redis_manager.encode_many(to_encode))
+        encoded_queries = [
+            decode_vector(entry.query_vector) if entry.query_vector else next(encoded)
+            for entry in request.entries
+        ]
 
-        cached_items = redis_client.zrange(cache_key, 0, -1)
-        
-        if len(cached_items) == 0:
-            return None
+        cached = await insert_entries(cluster, list(zip(request.entries, encoded_queries)))
+
+        return {"cached": cached}
+    except Exception as e:
+        print(f"Error in cache_responses: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error caching responses: {str(e)}")
 
-        results = []
-        for item in cached_items:
-            item_data = json.loads(item)
-            similarity = np.dot(encoded_query, item_data['query_vector']) / (np.linalg.norm(encoded_query) * np.linalg.norm(item_data['query_vector']))
-            results.append((similarity, item_data))
+def knn_command(university_id, generation, encoded_query):
+    knn_clause = f"KNN {TOP_K} @vector $vector"
+    if redis_manager.vector_index_algorithm == "HNSW":
+        knn_clause += f" EF_RUNTIME {redis_manager.hnsw_ef_runtime}"
+    query_vector, _ = redis_manager.codec.encode_vector(encoded_query)
+
+    return (
+        "FT.SEARCH", redis_manager.index_name,
+        f"(@university_id:{{{escape_tag(university_id)}}} @generation:{{{escape_tag(generation)}}})=>[{knn_clause} AS distance]",
+        "PARAMS", 2, "vector", query_vector,
+        "SORTBY", "distance",
+        "RETURN", 3, "query", "response", "distance",
+        "LIMIT", 0, TOP_K,
+        "DIALECT", 2,
+    )
+
+def parse_knn_reply(reply):
+    results = []
+    for doc_id, fields in zip(reply[1::2], reply[2::2]):
+        fields = dict(zip(fields[::2], fields[1::2]))
+        results.append((
+            1 - float(fields[b"distance"]),
+            doc_id.decode().rsplit(":", 1)[1],
+            fields[b"query"].decode(),
+            redis_manager.codec.decode_response(fields[b"response"]),
+        ))
+    return results
+
+async def search_indexes(cluster, lookups, generations):
+    async def build(pipeline, university_id, encoded_query):
+        pipeline.execute_command(*knn_command(university_id, generations[university_id], encoded_query))
+
+    with STAGE_LATENCY.labels(stage="scoring").time():
+        replies = await cluster.pipeline(lookups, build, binary=True)
+    return [parse_knn_reply(reply) for reply, in replies]
+
+async def fetch_entries(cluster, candidates):
+    async def build(pipeline, university_id, top_entries):
+        for _, entry_id in top_entries:
+            pipeline.hmget(entry_key(university_id, entry_id), "query", "response")
+
+    with STAGE_LATENCY.labels(stage="redis_fetch").time():
+        replies = await cluster.pipeline(candidates, build, binary=True)
+    return [
+        [
+            (score, entry_id, query.decode(), redis_manager.codec.decode_response(response))
+            for (score, entry_id), (query, response) in zip(top_entries, entries)
+            if response is not None
+        ]
+        for (_, top_entries), entries in zip(candidates, replies)
+    ]
+
+async def search_matrices(cluster, lookups, generations):
+    university_ids = list(dict.fromkeys(university_id for university_id, _ in lookups))
+
+    async def build(pipeline, university_id, scope_generation):
+        pipeline.get(matrix_key(university_id, scope_generation))
+        pipeline.lrange(ids_key(university_id, scope_generation), 0, -1)
+
+    with STAGE_LATENCY.labels(stage="redis_fetch").time():
+        replies = await cluster.pipeline([(university_id, generations[university_id]) for university_id in university_ids], build, binary=True, transaction=True)
+    matrices = {
+        university_id: (redis_manager.similarity_engine.load_matrix(blob), entry_ids)
+        for university_id, (blob, entry_ids) in zip(university_ids, replies)
+    }
+
+    candidates = []
+    with STAGE_LATENCY.labels(stage="scoring").time():
+        for university_id, encoded_query in lookups:
+            matrix, entry_ids = matrices[university_id]
+            mask = np.fromiter((bool(entry_id) for entry_id in entry_ids), dtype=bool, count=len(entry_ids))
+            rows, scores = await redis_manager.run_blocking(redis_manager.similarity_engine.top_k, matrix, encoded_query, TOP_K, mask)
+            candidates.append((university_id, [(float(score), entry_ids[row].decode()) for row, score in zip(rows, scores)]))
+
+    return await fetch_entries(cluster, candidates)
+
+async def exact_matches(cluster, queries, generations):
+    async def build(pipeline, university_id, query):
+        pipeline.hget(exact_key(university_id, generations[university_id]), query_fingerprint(query.input_str))
+
+    with STAGE_LATENCY.labels(stage="redis_fetch").time():
+        replies = await cluster.pipeline([(query.university_id, query) for query in queries], build, binary=True)
+    entry_ids = [entry_id for entry_id, in replies]
+    candidates = [
+        (query.university_id, [(1.0, entry_id.decode())] if entry_id else [])
+        for query, entry_id in zip(queries, entry_ids)
+    ]
+    return [results or None for results in await fetch_entries(cluster, candidates)]
+
+async def lookup(queries, cluster):
+    all_results = [[] for _ in queries]
+    tiers = ["miss"] * len(queries)
+    encoded_queries = [None] * len(queries)
+
+    available = [index for index, query in enumerate(queries) if cluster.is_available(query.university_id)]
+    with STAGE_LATENCY.labels(stage="redis_fetch").time():
+        generations = await redis_manager.generations.current_generations([queries[index].university_id for index in available])
+
+    misses = []
+    for index, results in zip(available, await exact_matches(cluster, [queries[index] for index in available], generations)):
+        if results:
+            all_results[index] = results
+            tiers[index] = "exact"
+        else:
+            misses.append(index)
+
+    if misses:
+        with STAGE_LATENCY.labels(stage="encode").time():
+            if len(misses) == 1:
+                encoded = [await redis_manager.encode(queries[misses[0]].input_str)]
+            else:
+                encoded = await redis_manager.encode_many([queries[index].input_str for index in misses])
+        lookups = [(queries[index].university_id, encoded_query) for index, encoded_query in zip(misses, encoded)]
+        if redis_manager.search_available:
+            semantic_results = await search_indexes(cluster, lookups, generations)
+        else:
+            semantic_results = await search_matrices(cluster, lookups, generations)
+        for index, encoded_query, top_results in zip(misses, encoded, semantic_results):
+            all_results[index] = top_results
+            encoded_queries[index] = encoded_query
+            tiers[index] = "semantic" if top_results and top_results[0][0] >= SEMANTIC_HIT_THRESHOLD else "miss"
 
-        results.sort(key=lambda x: x[0], reverse=True)
-        top_results = results[:3]
+    now = time.time()
 
-        if CACHE_EVICTION_ALGORITHM == "LFU":
-            for _, item_data in top_results:
-                redis_client.zincrby(cache_key, 1, json.dumps(item_data))
+    async def build(pipeline, university_id, index):
+        await redis_manager.eviction_policy.touch(
+            university_id, generations[university_id], [entry_id for _, entry_id, _, _ in all_results[index]], now, client=pipeline
+        )
+        redis_manager.budget.record_lookups([(university_id, tiers[index] != "miss")], pipeline)
 
-        return [{"query": item['query'], "response": json.loads(item['response']), "similarity": sim} for sim, item in top_results]
+    with STAGE_LATENCY.labels(stage="eviction").time():
+        await cluster.pipeline([(queries[index].university_id, index) for index in available], build)
+
+    for tier, top_results in zip(tiers, all_results):
+        CACHE_LOOKUPS.labels(tier=tier).inc()
+        top_similarity = top_results[0][0] if top_results else 0.0
+        if tier != "miss":
+            outcome = "hit"
+        elif top_similarity >= SEMANTIC_HIT_THRESHOLD - NEAR_MISS_MARGIN:
+            outcome = "near_miss"
+        else:
+            outcome = "miss"
+        TOP_SIMILARITY.labels(outcome=outcome).observe(top_similarity)
+
+    return [
+        {
+            "results": [{"query": cached_query, "response": json.loads(response), "similarity": sim} for sim, _, cached_query, response in top_results],
+            "query_vector": encode_vector(encoded_query) if encoded_query is not None else None,
+            "tier": tier,
+        }
+        for top_results, encoded_query, tier in zip(all_results, encoded_queries, tiers)
+    ]
+
+@router.post("/get_cached_response")
+async def get_cached_response(query: QueryRequest, cluster=Depends(get_cluster)):
+    try:
+        return (await lookup([query], cluster))[0]
 
     except Exception as e:
         print(f"Error in get_cached_response: {str(e)}")
@@ -95,27 +311,32 @@ async def get_cached_response(query: QueryRequest, redis_client=Depends(get_redi
         print(f"Exception args: {e.args}")
         raise HTTPException(status_code=500, detail=f"Error searching cache: {str(e)}")
 
+@router.post("/get_cached_responses")
+async def get_cached_responses(request: BulkQueryRequest, cluster=Depends(get_cluster)):
+    try:
+        return await lookup(request.queries, cluster)
+
+    except Exception as e:
+        print(f"Error in get_cached_responses: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching cache: {str(e)}")
+
 @router.post("/flush_university_cache")
-async def flush_university_cache(request: FlushUniversityCacheRequest, redis_client=Depends(get_redis_client)):
+async def flush_university_cache(request: FlushUniversityCacheRequest, cluster=Depends(get_cluster)):
     try:
-        cache_key = f"cache:{request.university_id}"
-        generic_cache_key = "cache:UNKNOWN"
-        
-        cache_size = redis_client.zcard(cache_key)
-        generic_cache_size = redis_client.zcard(generic_cache_key)
-        
+        invalidated = await redis_manager.generations.invalidate_universities([request.university_id, "UNKNOWN"])
+        cache_size = invalidated.get(request.university_id, 0)
+        generic_cache_size = invalidated.get("UNKNOWN", 0)
+
         total_entries_removed = 0
         messages = []
 
         if cache_size > 0:
-            redis_client.delete(cache_key)
             total_entries_removed += cache_size
             messages.append(f"Cache flushed for university_id: {request.university_id}")
         else:
             messages.append(f"No cache found for university_id: {request.university_id}")
 
         if generic_cache_size > 0:
-            redis_client.delete(generic_cache_key)
             total_entries_removed += generic_cache_size
             messages.append(f"Generic cache flushed")
         else:
@@ -132,13 +353,160 @@ async def flush_university_cache(request: FlushUniversityCacheRequest, redis_cli
         raise HTTPException(status_code=500, detail=f"Error flushing university cache: {str(e)}")
 
 @router.post("/flush_all_data")
-async def flush_all_data(redis_client=Depends(get_redis_client)):
+async def flush_all_data(cluster=Depends(get_cluster)):
     try:
-        redis_client.flushall()
-        
-        await redis_manager.ensure_index()
+        await redis_manager.generations.invalidate_all()
         
         return {"status": "All data flushed successfully"}
     except Exception as e:
         print(f"Error in flush_all_data: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error flushing data: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error flushing data: {str(e)}")
+
+async def read_entries(node, university_id, entry_ids):
+    codec = redis_manager.codec
+    binary_pipeline = node.binary_client.pipeline(transaction=False)
+    for entry_id in entry_ids:
+        binary_pipeline.hmget(entry_key(university_id, entry_id), "query", "response", "vector", "scale", "cost")
+    entries = await binary_pipeline.execute()
+
+    vectors, payloads = [], []
+    for query, response, vector, scale, cost in entries:
+        if response is None:
+            continue
+        vectors.append(np.frombuffer(vector, dtype=codec.dtype))
+        payloads.append({
+            "university_id": university_id,
+            "query": query.decode(),
+            "response": json.loads(codec.decode_response(response)),
+            "scale": float(scale or 1.0),
+            "cost": float(cost or 1.0),
+        })
+    return vectors, payloads
+
+async def insert_payloads(cluster, codec, vectors, payloads):
+    return await insert_entries(cluster, [
+        (
+            CacheRequest(
+                university_id=payload["university_id"],
+                query=payload["query"],
+                response=payload["response"],
+                version="snapshot",
+                cost=payload["cost"],
+            ),
+            codec.decode_vector(vector.tobytes(), payload["scale"]),
+        )
+        for vector, payload in zip(vectors, payloads)
+    ])
+
+async def owned_scopes(cluster, university_id=None):
+    if university_id:
+        node = cluster.node_for(university_id)
+        generations = await redis_manager.generations.current_generations([university_id])
+        return [(node, university_id, generations[university_id])] if university_id in generations else []
+
+    scopes = []
+    for node in cluster.healthy_nodes():
+        scopes.extend(
+            (node, scope_university_id, scope_generation)
+            for scope_university_id, scope_generation in await redis_manager.generations.current_scopes(node)
+            if cluster.node_for(scope_university_id) is node
+        )
+    return scopes
+
+async def refresh_usage_metrics():
+    usage = await redis_manager.budget.usage()
+    scopes = [(university_id, scope_generation) for university_id, (scope_generation, _) in usage.items()]
+
+    async def build(pipeline, university_id, scope_generation):
+        pipeline.zcard(rank_key(university_id, scope_generation))
+
+    counts = await redis_manager.cluster.pipeline(scopes, build)
+    CACHE_ENTRIES.clear()
+    CACHE_BYTES.clear()
+    for (university_id, _), (count,) in zip(scopes, counts):
+        CACHE_ENTRIES.labels(university_id=university_id).set(count)
+        CACHE_BYTES.labels(university_id=university_id).set(usage[university_id][1])
+
+async def export_snapshot(cluster, name, university_id=None):
+    path = snapshot_path(SNAPSHOT_DIR, name)
+    scopes = await owned_scopes(cluster, university_id)
+    entry_ids = [
+        await node.redis_client.zrange(rank_key(scope_university_id, scope_generation), 0, -1)
+        for node, scope_university_id, scope_generation in scopes
+    ]
+
+    codec = redis_manager.codec
+    writer = await redis_manager.run_blocking(
+        SnapshotWriter, path, codec.vector_type, redis_manager.vector_dimension, sum(len(ids) for ids in entry_ids)
+    )
+    for (node, scope_university_id, _), ids in zip(scopes, entry_ids):
+        for offset in range(0, len(ids), SNAPSHOT_CHUNK_SIZE):
+            vectors, payloads = await read_entries(node, scope_university_id, ids[offset:offset + SNAPSHOT_CHUNK_SIZE])
+            if payloads:
+                await redis_manager.run_blocking(writer.write, np.stack(vectors), payloads)
+
+    await redis_manager.run_blocking(lambda: writer.close(university_id=university_id))
+    return path, writer.written
+
+async def restore_snapshot(cluster, name):
+    reader = await redis_manager.run_blocking(SnapshotReader, snapshot_path(SNAPSHOT_DIR, name))
+    if reader.manifest["dimension"] != redis_manager.vector_dimension:
+        raise ValueError(f"Snapshot has {reader.manifest['dimension']}-dimensional vectors, expected {redis_manager.vector_dimension}")
+    snapshot_codec = EntryCodec(reader.manifest["vector_type"], 1)
+
+    restored = 0
+    chunks = reader.chunks(SNAPSHOT_CHUNK_SIZE)
+    while True:
+        chunk = await redis_manager.run_blocking(next, chunks, None)
+        if chunk is None:
+            break
+        vectors, payloads = chunk
+        restored += await insert_payloads(cluster, snapshot_codec, vectors, payloads)
+    return restored
+
+async def warm_start(name):
+    cluster = redis_manager.cluster
+    if await owned_scopes(cluster):
+        print(f"Cache already populated, skipping restore from snapshot '{name}'.")
+        return
+    restored = await restore_snapshot(cluster, name)
+    print(f"Restored {restored} cache entries from snapshot '{name}'.")
+
+async def move_scope(cluster, source, university_id, scope_generation):
+    ids = await source.redis_client.zrange(rank_key(university_id, scope_generation), 0, -1)
+    moved = 0
+    for offset in range(0, len(ids), SNAPSHOT_CHUNK_SIZE):
+        vectors, payloads = await read_entries(source, university_id, ids[offset:offset + SNAPSHOT_CHUNK_SIZE])
+        moved += await insert_payloads(cluster, redis_manager.codec, vectors, payloads)
+    await redis_manager.generations.invalidate_node_universities(source, [university_id])
+    return moved
+
+async def rebalance():
+    cluster = redis_manager.cluster
+    moved = 0
+    for node in cluster.healthy_nodes():
+        for university_id, scope_generation in await redis_manager.generations.current_scopes(node):
+            owner = cluster.node_for(university_id)
+            if owner is not node and owner.healthy:
+                moved += await move_scope(cluster, node, university_id, scope_generation)
+    if moved:
+        print(f"Rebalanced {moved} cache entries across {len(cluster.nodes)} Redis nodes.")
+    return moved
+
+@router.post("/snapshot")
+async def snapshot(request: SnapshotRequest, cluster=Depends(get_cluster)):
+    try:
+        path, entries = await export_snapshot(cluster, request.name, request.university_id)
+        return {"status": "success", "path": path, "entries": entries}
+    except Exception as e:
+        print(f"Error in snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error creating snapshot: {str(e)}")
+
+@router.post("/restore")
+async def restore(request: SnapshotRequest, cluster=Depends(get_cluster)):
+    try:
+        entries = await restore_snapshot(cluster, request.name)
+        return {"status": "success", "entries_restored": entries}
+    except Exception as e:
+        print(f"Error in restore: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error restoring snapshot: {str(e)}")
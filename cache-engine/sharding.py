@@ -0,0 +1,138 @@
+import asyncio
+import bisect
+import hashlib
+import redis.asyncio as aioredis
+
+def ring_hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+class HashRing:
+    def __init__(self, node_names, replicas):
+        self.replicas = replicas
+        self.points = []
+        self.owners = {}
+        for node_name in node_names:
+            self.add(node_name)
+
+    def add(self, node_name):
+        for replica in range(self.replicas):
+            point = ring_hash(f"{node_name}#{replica}")
+            bisect.insort(self.points, point)
+            self.owners[point] = node_name
+
+    def node_for(self, key):
+        index = bisect.bisect(self.points, ring_hash(key)) % len(self.points)
+        return self.owners[self.points[index]]
+
+class RedisNode:
+    def __init__(self, host, port, max_connections):
+        self.name = f"{host}:{port}"
+        self.healthy = True
+        self.redis_client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(
+            host=host,
+            port=port,
+            max_connections=max_connections,
+            decode_responses=True
+        ))
+        self.binary_client = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(
+            host=host,
+            port=port,
+            max_connections=max_connections,
+            decode_responses=False
+        ))
+
+    async def close(self):
+        await self.redis_client.aclose(close_connection_pool=True)
+        await self.binary_client.aclose(close_connection_pool=True)
+
+class RedisCluster:
+    def __init__(self, addresses, max_connections, replicas, health_interval, health_timeout):
+        self.nodes = {}
+        for host, port in addresses:
+            node = RedisNode(host, port, max_connections)
+            self.nodes[node.name] = node
+        self.ring = HashRing(self.nodes, replicas)
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.on_recovery = None
+        self.worker = None
+
+    @property
+    def primary(self):
+        return next(iter(self.nodes.values()))
+
+    def healthy_nodes(self):
+        return [node for node in self.nodes.values() if node.healthy]
+
+    def node_for(self, university_id):
+        return self.nodes[self.ring.node_for(university_id)]
+
+    def is_available(self, university_id):
+        return self.node_for(university_id).healthy
+
+    def group(self, university_ids):
+        groups = {}
+        for university_id in dict.fromkeys(university_ids):
+            groups.setdefault(self.node_for(university_id), []).append(university_id)
+        return groups
+
+    async def pipeline(self, items, build, binary=False, transaction=False):
+        groups = {}
+        for index, (university_id, _) in enumerate(items):
+            groups.setdefault(self.node_for(university_id), []).append(index)
+        results = [None] * len(items)
+
+        async def execute(node, indexes):
+            client = node.binary_client if binary else node.redis_client
+            pipeline = client.pipeline(transaction=transaction)
+            spans = []
+            for index in indexes:
+                start = len(pipeline)
+                await build(pipeline, *items[index])
+                spans.append((index, start, len(pipeline)))
+            replies = await pipeline.execute()
+            for index, start, end in spans:
+                results[index] = replies[start:end]
+
+        await asyncio.gather(*(execute(node, indexes) for node, indexes in groups.items()))
+        return results
+
+    def start(self):
+        self.worker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+
+    async def check(self, node):
+        try:
+            await asyncio.wait_for(node.redis_client.ping(), self.health_timeout)
+        except Exception as e:
+            if node.healthy:
+                print(f"Redis node {node.name} is unhealthy: {str(e)}")
+            node.healthy = False
+            return
+
+        if not node.healthy:
+            if self.on_recovery:
+                try:
+                    await self.on_recovery(node)
+                except Exception as e:
+                    print(f"Error recovering Redis node {node.name}: {str(e)}")
+                    return
+            print(f"Redis node {node.name} recovered.")
+            node.healthy = True
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self.check(node) for node in self.nodes.values()))
+
+    async def close(self):
+        await self.stop()
+        for node in self.nodes.values():
+            await node.close()
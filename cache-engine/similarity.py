@@ -0,0 +1,46 @@
+import numpy as np
+
+class SimilarityEngine:
+    def __init__(self, vector_dimension, dtype=np.float32):
+        self.vector_dimension = vector_dimension
+        self.dtype = np.dtype(dtype)
+        self.row_size = self.vector_dimension * self.dtype.itemsize
+
+    def normalize(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector, axis=-1, keepdims=True)
+        return vector / np.maximum(norm, 1e-12)
+
+    def to_row(self, vector):
+        vector = self.normalize(vector)
+        if self.dtype == np.int8:
+            peak = np.maximum(np.max(np.abs(vector), axis=-1, keepdims=True), 1e-12)
+            vector = np.rint(vector / peak * 127)
+        return vector.astype(self.dtype).tobytes()
+
+    def load_matrix(self, blob):
+        if not blob:
+            return np.empty((0, self.vector_dimension), dtype=self.dtype)
+        return np.frombuffer(blob, dtype=self.dtype).reshape(-1, self.vector_dimension)
+
+    def top_k(self, matrix, query_vector, k, mask=None):
+        if matrix.shape[0] == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        matrix = matrix.astype(np.float32, copy=False)
+        scores = matrix @ self.normalize(query_vector)
+        if self.dtype == np.int8:
+            scores /= np.maximum(np.linalg.norm(matrix, axis=1), 1e-12)
+        if mask is not None:
+            scores[~mask] = -np.inf
+            k = min(k, int(mask.sum()))
+
+        k = min(k, scores.shape[0])
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if k < scores.shape[0]:
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(scores.shape[0])
+        order = candidates[np.argsort(scores[candidates])[::-1]]
+        return order, scores[order]
@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import re
+import time
+import numpy as np
+import zstandard
+from codec import VECTOR_DTYPES
+
+SNAPSHOT_NAME_PATTERN = re.compile(r"[\w.-]+")
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl.zst"
+
+def snapshot_path(snapshot_dir, name):
+    if not SNAPSHOT_NAME_PATTERN.fullmatch(name) or not name.strip("."):
+        raise ValueError(f"Invalid snapshot name: {name!r}")
+    root = os.path.realpath(snapshot_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.dirname(path) != root:
+        raise ValueError(f"Snapshot name {name!r} resolves outside {snapshot_dir}")
+    return path
+
+class SnapshotWriter:
+    def __init__(self, path, vector_type, dimension, count):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.vector_type = vector_type
+        self.dtype = np.dtype(VECTOR_DTYPES[vector_type])
+        self.dimension = dimension
+        self.count = count
+        self.written = 0
+        self.vectors = np.lib.format.open_memmap(
+            os.path.join(path, VECTORS_FILE), mode="w+", dtype=self.dtype, shape=(count, dimension)
+        )
+        self.payload_file = open(os.path.join(path, PAYLOADS_FILE), "wb")
+        self.payloads = zstandard.ZstdCompressor().stream_writer(self.payload_file)
+
+    def write(self, vectors, payloads):
+        self.vectors[self.written:self.written + len(payloads)] = vectors
+        for payload in payloads:
+            self.payloads.write(json.dumps(payload).encode() + b"\n")
+        self.written += len(payloads)
+
+    def close(self, **manifest):
+        self.vectors.flush()
+        del self.vectors
+        self.payloads.close()
+        self.payload_file.close()
+        manifest.update({
+            "created_at": time.time(),
+            "vector_type": self.vector_type,
+            "dimension": self.dimension,
+            "count": self.written,
+        })
+        with open(os.path.join(self.path, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f)
+
+class SnapshotReader:
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.path = path
+        self.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+
+    def chunks(self, chunk_size):
+        with open(os.path.join(self.path, PAYLOADS_FILE), "rb") as payload_file:
+            reader = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(payload_file), encoding="utf-8")
+            lines = (json.loads(line) for line in reader)
+            row = 0
+            while row < self.manifest["count"]:
+                payloads = [payload for _, payload in zip(range(chunk_size), lines)]
+                if not payloads:
+                    break
+                yield self.vectors[row:row + len(payloads)], payloads
+                row += len(payloads)
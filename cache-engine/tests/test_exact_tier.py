@@ -0,0 +1,115 @@
+import hashlib
+import os
+import sys
+import numpy as np
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENVIRONMENT = {
+    "VECTOR_DIMENSION": "16",
+    "EMBEDER": "test",
+    "EMBEDDING_BACKEND": "TORCH",
+    "ONNX_MODEL_DIR": "/tmp/onnx",
+    "ONNX_QUANTIZED": "true",
+    "ONNX_THREADS": "0",
+    "INDEX_NAME": "idx:cache",
+    "MAX_CACHE_PER": "100",
+    "SEMANTIC_HIT_THRESHOLD": "0.60",
+    "NEAR_MISS_MARGIN": "0.10",
+    "CACHE_ALGO": "LFU",
+    "VECTOR_INDEX_ALGO": "FLAT",
+    "HNSW_M": "16",
+    "HNSW_EF_CONSTRUCTION": "200",
+    "HNSW_EF_RUNTIME": "10",
+    "VECTOR_TYPE": "FLOAT16",
+    "RESPONSE_COMPRESSION_LEVEL": "3",
+    "ENCODE_WORKERS": "2",
+    "REDIS_MAX_CONNECTIONS": "8",
+    "REDIS_NODES": "",
+    "HOST": "redis",
+    "PORT": "6379",
+    "CACHE_RING_REPLICAS": "16",
+    "CACHE_NODE_HEALTH_INTERVAL": "5",
+    "CACHE_NODE_HEALTH_TIMEOUT": "1",
+    "EMBED_BATCH_SIZE": "8",
+    "EMBED_BATCH_WAIT_MS": "1",
+    "EMBED_CACHE_SIZE": "64",
+    "SNAPSHOT_DIR": "/tmp/snapshots",
+    "RESTORE_SNAPSHOT": "",
+    "CACHE_GC_INTERVAL": "30",
+    "CACHE_GC_BATCH_SIZE": "500",
+    "CACHE_MEMORY_BUDGET": "0",
+    "CACHE_BUDGET_INTERVAL": "1",
+    "CACHE_BUDGET_BATCH_SIZE": "100",
+    "CACHE_BUDGET_STATS_WINDOW": "100",
+    "CACHE_DEFAULT_RESERVATION": "0",
+    "CACHE_RESERVATIONS": "",
+}
+for name, value in ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
+
+from fastapi.testclient import TestClient
+import main
+import sharding
+import utils
+
+class WordEmbedder:
+    def __init__(self, dimension):
+        self.dimension = dimension
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+        return vectors
+
+@pytest.fixture
+def client(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(sharding.aioredis, "Redis", lambda connection_pool: fakeredis.aioredis.FakeRedis(
+        server=server, decode_responses=connection_pool.connection_kwargs["decode_responses"]
+    ))
+    monkeypatch.setattr(utils, "load_embedder", lambda *args: WordEmbedder(utils.redis_manager.vector_dimension))
+    with TestClient(main.app) as client:
+        yield client
+
+# Request bodies as ai-engine/main.py builds them for a query that names a known university.
+def ai_engine_lookup(query, university_name, university_id):
+    return {
+        "input_str": f"{query}. The name of the university is {university_name} and the associated id is {university_id}",
+        "university_id": university_id,
+    }
+
+def ai_engine_insert(lookup, response, query_vector):
+    return {
+        "university_id": lookup["university_id"],
+        "query": lookup["input_str"],
+        "response": response,
+        "version": "1",
+        "query_vector": query_vector,
+    }
+
+def test_known_university_hits_exact_tier(client):
+    lookup = ai_engine_lookup("How many events are there in the fest?", "Test University", "U1")
+    miss = client.post("/get_cached_response", json=lookup).json()
+    assert miss["tier"] == "miss"
+
+    assert client.post("/cache_response", json=ai_engine_insert(lookup, "42 events", miss["query_vector"])).json() is True
+
+    repeat = ai_engine_lookup("how many events are there in the fest", "Test University", "U1")
+    hit = client.post("/get_cached_response", json=repeat).json()
+    assert hit["tier"] == "exact"
+    assert hit["results"][0]["response"] == "42 events"
+    assert hit["query_vector"] is None
+
+def test_exact_tier_is_scoped_to_university(client):
+    lookup = ai_engine_lookup("How many events are there in the fest?", "Test University", "U1")
+    miss = client.post("/get_cached_response", json=lookup).json()
+    client.post("/cache_response", json=ai_engine_insert(lookup, "42 events", miss["query_vector"]))
+
+    other = ai_engine_lookup("How many events are there in the fest?", "Other University", "U2")
+    assert client.post("/get_cached_response", json=other).json()["tier"] != "exact"
@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot import snapshot_path
+
+@pytest.mark.parametrize("name", ["..", ".", "...", "../escape", "nightly\n", "", "a/b"])
+def test_rejects_names_outside_snapshot_dir(tmp_path, name):
+    with pytest.raises(ValueError):
+        snapshot_path(str(tmp_path / "snapshots"), name)
+
+def test_rejects_symlink_out_of_snapshot_dir(tmp_path):
+    snapshot_dir = tmp_path / "snapshots"
+    snapshot_dir.mkdir()
+    (snapshot_dir / "linked").symlink_to(tmp_path)
+    with pytest.raises(ValueError):
+        snapshot_path(str(snapshot_dir), "linked")
+
+def test_accepts_plain_names(tmp_path):
+    snapshot_dir = tmp_path / "snapshots"
+    path = snapshot_path(str(snapshot_dir), "nightly-2024.06.01")
+    assert os.path.dirname(path) == os.path.realpath(snapshot_dir)
@@ -1,51 +1,211 @@
+import asyncio
 import os
+import numpy as np
 import redis
-from redis.commands.search.field import TextField, VectorField
+from cachetools import LRUCache
+from concurrent.futures import ThreadPoolExecutor
+from redis.commands.search.field import TagField, TextField, VectorField
 from redis.commands.search.indexDefinition import IndexDefinition, IndexType
-from sentence_transformers import SentenceTransformer
+from similarity import SimilarityEngine
+from codec import EntryCodec
+from batcher import EmbeddingBatcher
+from eviction import EVICTION_POLICIES
+from generations import GenerationManager
+from embedders import load_embedder
+from budget import BudgetManager
+from sharding import RedisCluster
 
 class RedisManager:
     def __init__(self):
-        self.redis_client = None
+        self.cluster = None
         self.embedder = None
+        self.executor = None
+        self.batcher = None
+        self.eviction_policy = None
+        self.generations = None
+        self.budget = None
         self.vector_dimension = int(os.environ['VECTOR_DIMENSION'])
+        self.index_name = os.environ['INDEX_NAME']
+        self.eviction_algorithm = os.environ['CACHE_ALGO']
+        self.vector_index_algorithm = os.environ['VECTOR_INDEX_ALGO'].upper()
+        self.hnsw_m = int(os.environ['HNSW_M'])
+        self.hnsw_ef_construction = int(os.environ['HNSW_EF_CONSTRUCTION'])
+        self.hnsw_ef_runtime = int(os.environ['HNSW_EF_RUNTIME'])
+        self.max_connections = int(os.environ['REDIS_MAX_CONNECTIONS'])
+        self.redis_nodes = [
+            (host, int(port))
+            for host, port in (
+                node.strip().rsplit(":", 1) for node in os.environ['REDIS_NODES'].split(",") if node.strip()
+            )
+        ] or [(os.environ['HOST'], int(os.environ['PORT']))]
+        self.ring_replicas = int(os.environ['CACHE_RING_REPLICAS'])
+        self.node_health_interval = float(os.environ['CACHE_NODE_HEALTH_INTERVAL'])
+        self.node_health_timeout = float(os.environ['CACHE_NODE_HEALTH_TIMEOUT'])
+        self.encode_workers = int(os.environ['ENCODE_WORKERS'])
+        self.embedding_backend = os.environ['EMBEDDING_BACKEND'].upper()
+        self.onnx_model_dir = os.environ['ONNX_MODEL_DIR']
+        self.onnx_quantized = os.environ['ONNX_QUANTIZED'].lower() in ("1", "true", "yes")
+        self.onnx_threads = int(os.environ['ONNX_THREADS'])
+        self.embed_batch_size = int(os.environ['EMBED_BATCH_SIZE'])
+        self.embed_batch_wait_ms = float(os.environ['EMBED_BATCH_WAIT_MS'])
+        self.embedding_cache = LRUCache(maxsize=int(os.environ['EMBED_CACHE_SIZE']))
+        self.gc_interval = float(os.environ['CACHE_GC_INTERVAL'])
+        self.gc_batch_size = int(os.environ['CACHE_GC_BATCH_SIZE'])
+        self.memory_budget = int(os.environ['CACHE_MEMORY_BUDGET'])
+        self.budget_interval = float(os.environ['CACHE_BUDGET_INTERVAL'])
+        self.budget_batch_size = int(os.environ['CACHE_BUDGET_BATCH_SIZE'])
+        self.budget_stats_window = int(os.environ['CACHE_BUDGET_STATS_WINDOW'])
+        self.default_reservation = int(os.environ['CACHE_DEFAULT_RESERVATION'])
+        self.reservations = {
+            university_id.strip(): int(reserved)
+            for university_id, reserved in (
+                item.split("=", 1) for item in os.environ['CACHE_RESERVATIONS'].split(",") if item.strip()
+            )
+        }
+        self.codec = EntryCodec(os.environ['VECTOR_TYPE'], int(os.environ['RESPONSE_COMPRESSION_LEVEL']))
+        self.similarity_engine = SimilarityEngine(self.vector_dimension, self.codec.dtype)
+        self.search_available = True
 
     async def initialize(self):
-        self.redis_client = redis.Redis(
-            host=os.environ['HOST'],
-            port=int(os.environ['PORT']),
-            decode_responses=True
+        self.cluster = RedisCluster(
+            self.redis_nodes,
+            self.max_connections,
+            self.ring_replicas,
+            self.node_health_interval,
+            self.node_health_timeout,
+        )
+        self.cluster.on_recovery = self.recover_node
+        self.eviction_policy = EVICTION_POLICIES[self.eviction_algorithm](self.cluster.primary.redis_client)
+        self.generations = GenerationManager(self.cluster, self.gc_interval, self.gc_batch_size)
+        self.budget = BudgetManager(
+            self.cluster,
+            self.eviction_policy,
+            self.generations,
+            self.similarity_engine.row_size,
+            self.memory_budget,
+            self.reservations,
+            self.default_reservation,
+            self.budget_interval,
+            self.budget_batch_size,
+            self.budget_stats_window,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=self.encode_workers, thread_name_prefix="encoder")
+        self.embedder = await self.run_blocking(
+            load_embedder,
+            self.embedding_backend,
+            os.environ['EMBEDER'],
+            self.onnx_model_dir,
+            self.onnx_quantized,
+            self.onnx_threads,
         )
-        self.embedder = SentenceTransformer(os.environ['EMBEDER'])
-        await self.ensure_index()
+        self.batcher = EmbeddingBatcher(self.encode_batch, self.embed_batch_size, self.embed_batch_wait_ms, self.encode_workers)
+        self.batcher.start()
+        for node in self.cluster.nodes.values():
+            await self.cluster.check(node)
+            if node.healthy:
+                await self.ensure_index(node)
+        self.cluster.start()
+        self.generations.start()
+        self.budget.start()
+
+    async def run_blocking(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def encode_batch(self, texts):
+        encoded = await self.run_blocking(self.embedder.encode, texts)
+        return encoded.astype(np.float32)
+
+    async def encode(self, text):
+        cache_key = " ".join(text.split())
+        encoded = self.embedding_cache.get(cache_key)
+        if encoded is None:
+            encoded = await self.batcher.encode(cache_key)
+            self.embedding_cache[cache_key] = encoded
+        return encoded
 
-    async def ensure_index(self):
-        index_name = os.environ['INDEX_NAME']
+    async def encode_many(self, texts):
+        cache_keys = [" ".join(text.split()) for text in texts]
+        encoded = {key: self.embedding_cache[key] for key in cache_keys if key in self.embedding_cache}
+        missing = list(dict.fromkeys(key for key in cache_keys if key not in encoded))
+        if missing:
+            for cache_key, vector in zip(missing, await self.encode_batch(missing)):
+                self.embedding_cache[cache_key] = vector
+                encoded[cache_key] = vector
+        return [encoded[key] for key in cache_keys]
+
+    def vector_index_attributes(self):
+        attributes = {
+            "TYPE": self.codec.vector_type,
+            "DIM": self.vector_dimension,
+            "DISTANCE_METRIC": "COSINE",
+        }
+        if self.vector_index_algorithm == "HNSW":
+            attributes.update({
+                "M": self.hnsw_m,
+                "EF_CONSTRUCTION": self.hnsw_ef_construction,
+                "EF_RUNTIME": self.hnsw_ef_runtime,
+            })
+        return attributes
+
+    def index_is_current(self, info):
+        definition = dict(zip(info['index_definition'][::2], info['index_definition'][1::2]))
+        if definition.get('key_type') != 'HASH':
+            return False
+        attributes = [
+            {str(key).lower(): value for key, value in zip(attribute[::2], attribute[1::2])}
+            for attribute in info.get('attributes', [])
+        ]
+        if not {"university_id", "generation", "vector"} <= {attribute.get('attribute') for attribute in attributes}:
+            return False
+        for attribute in attributes:
+            if attribute.get('attribute') != 'vector':
+                continue
+            if 'algorithm' in attribute and str(attribute['algorithm']).upper() != self.vector_index_algorithm:
+                return False
+            if 'data_type' in attribute and str(attribute['data_type']).upper() != self.codec.vector_type:
+                return False
+        return True
+
+    async def recover_node(self, node):
+        await self.ensure_index(node)
+        await self.generations.invalidate_node(node)
+
+    async def ensure_index(self, node):
+        index_name = self.index_name
         try:
-            self.redis_client.ft(index_name).info()
-            print(f"Index '{index_name}' already exists.")
-        except redis.ResponseError:
-            schema = (
-                TextField("$.university_id", no_stem=True, as_name="university_id"),
-                TextField("$.query", as_name="query"),
-                TextField("$.response", as_name="response"),
-                VectorField(
-                    "$.query_vector",
-                    "FLAT",
-                    {
-                        "TYPE": "FLOAT32",
-                        "DIM": self.vector_dimension,
-                        "DISTANCE_METRIC": "COSINE",
-                    },
-                    as_name="vector",
-                ),
-            )
-            definition = IndexDefinition(prefix=["cache:"], index_type=IndexType.JSON)
-            self.redis_client.ft(index_name).create_index(fields=schema, definition=definition)
-            print(f"Index '{index_name}' created successfully.")
+            info = await node.redis_client.ft(index_name).info()
+            if self.index_is_current(info):
+                print(f"Index '{index_name}' already exists.")
+                return
+            print(f"Index '{index_name}' has an outdated definition, recreating it.")
+            await node.redis_client.ft(index_name).dropindex(delete_documents=False)
+        except redis.ResponseError as e:
+            if "unknown command" in str(e).lower():
+                self.search_available = False
+                print("RediSearch module not available, falling back to in-process similarity search.")
+                return
+
+        schema = (
+            TagField("university_id"),
+            TagField("generation"),
+            TextField("query"),
+            VectorField("vector", self.vector_index_algorithm, self.vector_index_attributes()),
+        )
+        definition = IndexDefinition(prefix=["cache:"], index_type=IndexType.HASH)
+        await node.redis_client.ft(index_name).create_index(fields=schema, definition=definition)
+        print(f"{self.vector_index_algorithm} index '{index_name}' created successfully on {node.name}.")
 
     async def close(self):
-        if self.redis_client:
-            await self.redis_client.close()
+        if self.batcher:
+            await self.batcher.stop()
+        if self.generations:
+            await self.generations.stop()
+        if self.budget:
+            await self.budget.stop()
+        if self.cluster:
+            await self.cluster.close()
+        if self.executor:
+            self.executor.shutdown(wait=False)
 
-redis_manager = RedisManager()
\ No newline at end of file
+redis_manager = RedisManager()
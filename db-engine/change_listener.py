@@ -62,7 +62,7 @@ class ChangeListener:
                         if notify.channel == 'data_changes':
                             university_id = payload.get('university_id')
                             if university_id:
-                                await self.write_callback(university_id)
+                                await self.write_callback(university_id, payload.get('table_name'))
                         elif notify.channel == 'schema_changes':
                             await self.schema_callback()
                     except json.JSONDecodeError:
@@ -22,9 +22,12 @@ class Notifier:
             filemode='w'
         )
 
-    async def notify_cache_engine(self, university_id):
+    async def notify_cache_engine(self, university_id, table_name=None):
         logging.info(f"Data update notification received for university with id: {university_id}")
         async with httpx.AsyncClient() as client:
+            tasks = [self.notify_llm_server_data_change(client, server, university_id, table_name) for server in self.llm_endpoints]
+            await asyncio.gather(*tasks)
+
             try:
                 response = await client.post(f"{self.cache_engine_endpoint}/flush_university_cache", json={"university_id": university_id})
                 if response.status_code == 200:
@@ -40,15 +43,15 @@ class Notifier:
             tasks = [self.notify_llm_server(client, server) for server in self.llm_endpoints]
             await asyncio.gather(*tasks)
 
-            try:
-                response = await client.post(f"{self.cache_engine_endpoint}/flush_all_data")
-                if response.status_code == 200:
-                    logging.info(f"Successfully notified cache-engine to flush all data.")
-                else:
-                    logging.error(f"Failed to notify cache-engine. Status code: {response.status_code}")
-            except Exception as e:
-                logging.error(f"Error notifying cache-engine: {str(e)}")
-                raise
+    async def notify_llm_server_data_change(self, client, server, university_id, table_name):
+        try:
+            response = await client.post(f"{server}/data_changed", json={"university_id": university_id, "table_name": table_name})
+            if response.status_code == 200:
+                logging.info(f"Successfully notified {server} of data change for university_id: {university_id}")
+            else:
+                logging.error(f"Failed to notify {server} of data change. Status: {response.status_code}")
+        except Exception as e:
+            logging.error(f"Error notifying {server} of data change: {str(e)}")
 
     async def notify_llm_server(self, client, server):
         try: